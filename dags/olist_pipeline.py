@@ -1,6 +1,9 @@
 from airflow import DAG
 from airflow.operators.bash import BashOperator
+from airflow.operators.python import PythonOperator
 from datetime import datetime, timedelta
+import logging
+import sys
 
 
 # --- Cofigurações ---
@@ -15,6 +18,28 @@ default_args = {
     'retry_delay' : timedelta(minutes=1)
 }
 
+# Métricas por etapa (jobs/common/metrics.py): cada job grava em pipeline_run_metrics e no JSONL
+# da execução. OLIST_PROFILE ativa cProfile nas etapas indicadas ao disparar a DAG, ex.:
+# {"profile": "silver.*,gold.fato_vendas"} -> .prof em logs/pipeline_metrics/profiles/<run_id>/
+# OLIST_ENGINE escolhe o motor de Silver/Gold por execução: {"engine": "duckdb"} (padrão "pandas").
+JOB_ENV = {'OLIST_PROFILE': '{{ params.profile }}', 'OLIST_ENGINE': '{{ params.engine }}'}
+
+
+def report_pipeline_metrics(**context):
+    """Resume as métricas da execução por tarefa (log + XCom)."""
+    sys.path.insert(0, '/opt/airflow/jobs')
+    from common.metrics import summarize_run
+
+    summary = summarize_run(context['run_id'])
+    for task_id, totals in summary.items():
+        logging.info(f"{task_id}: {totals['etapas']} etapas em {totals['duracao_s']:.1f}s, "
+                     f"{totals['rows_out']:,} linhas gravadas, "
+                     f"{totals['bytes_read'] / 1024**2:.1f} MB lidos / {totals['bytes_written'] / 1024**2:.1f} MB gravados, "
+                     f"carga no DW {totals['db_load_s']:.1f}s, pico RSS {totals['peak_rss_mb']:.0f} MB"
+                     + (f", falhas: {', '.join(totals['falhas'])}" if totals['falhas'] else "")
+                     + (f", perfis: {', '.join(totals['perfis'])}" if totals['perfis'] else ""))
+    return summary
+
 #--- Definição do DAG ---
 with DAG(
     'olist_etl_full', # Id no airflow
@@ -23,39 +48,57 @@ with DAG(
     schedule_interval = '0 8 * * *',
     start_date = datetime(2024, 1, 1),
     catchup = False,
+    params = {'profile': '', 'engine': 'pandas'},
     tags = ['olist', 'elt']
 ) as dag:
 
     # --- Ingestão (Bronze) ---
     task_bronze = BashOperator(
         task_id ='ingest_bronze',
-        bash_command = 'python /opt/airflow/jobs/ingestion/ingest_bronze.py',
-        doc_md = "# Ingestão Bronze \nLê do MYSQL e Salva Parquet raw no MinIO." 
+        bash_command = 'python /opt/airflow/jobs/ingestion/ingest_bronze.py --mode incremental --workers 4',
+        env = JOB_ENV,
+        append_env = True,
+        doc_md = "# Ingestão Bronze \nLê do MYSQL (apenas o delta desde a última watermark) e Salva Parquet raw no MinIO." 
         )
     
     # --- Transformação Silver ---
     task_silver = BashOperator(
         task_id = 'transform_silver',
         bash_command = 'python /opt/airflow/jobs/transformation/transform_silver.py',
+        env = JOB_ENV,
+        append_env = True,
         doc_md = "# Transformação Silver \nLimpeza e feature engineering (ML.)"
     )
 
     #--- Transformação Gold --- 
     task_gold = BashOperator(
            task_id = 'transform_gold',
-           bash_command = 'python /opt/airflow/jobs/transformation/transform_gold.py',
-           doc_md = '# Modelagem Gold\nCriação de Fatos e Dimensões no Postgres (DW). '
+           bash_command = 'python /opt/airflow/jobs/transformation/transform_gold.py --load-mode merge',
+           env = JOB_ENV,
+           append_env = True,
+           doc_md = '# Modelagem Gold\nCriação de Fatos e Dimensões no Postgres (DW), com upsert apenas das linhas novas/alteradas e atualização dos agregados (agg_*) só nos dias afetados. '
     )
     
     # --- Predição de atraso --- 
     task_predict = BashOperator(
         task_id='predict_delay',
         bash_command='python /opt/airflow/jobs/ml/predict_delay.py',
+        env=JOB_ENV,
+        append_env=True,
         doc_md="## Inteligência Artificial\nAplica o modelo treinado para prever riscos de atraso na Gold."
     )
 
 
+    # --- Métricas da execução ---
+    task_metrics = PythonOperator(
+        task_id='pipeline_metrics',
+        python_callable=report_pipeline_metrics,
+        trigger_rule='all_done',
+        doc_md="## Métricas\nResumo por tarefa (tempo, linhas, bytes no MinIO, carga no DW, pico de memória e perfis) a partir das métricas gravadas pelos jobs."
+    )
+
+
     #--- Orquestração ---
-    task_bronze >> task_silver >> task_gold >> task_predict
+    task_bronze >> task_silver >> task_gold >> task_predict >> task_metrics
  
 
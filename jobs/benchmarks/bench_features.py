@@ -0,0 +1,100 @@
+"""Paridade e benchmark das features de atraso: código original (pandas .apply/.map) x features.py.
+
+Uso: python jobs/benchmarks/bench_features.py [--rows 1000000]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MODEL_DIR = Path(__file__).resolve().parents[1] / "ml" / "models"
+sys.path.insert(0, str(MODEL_DIR.parents[1]))
+sys.path.insert(0, str(MODEL_DIR.parent))
+from features import build_feature_matrix, build_risk_lookups, haversine_distance  # noqa: E402
+
+
+def make_order_items(rows, route_risk, category_risk, seed=42):
+    """Merge sintético pedido/item/produto/cliente/vendedor no formato usado por run_inference."""
+    rng = np.random.default_rng(seed)
+    states = np.array(sorted({s for key in route_risk for s in key.split("_")}) + ["XX"], dtype=object)
+    categories = np.array(list(category_risk) + ["categoria_nova", None], dtype=object)
+    purchase = pd.Timestamp("2018-06-01") + pd.to_timedelta(rng.integers(0, 90 * 86400, size=rows), unit="s")
+    approved = pd.Series(purchase + pd.to_timedelta(rng.integers(-3600, 48 * 3600, size=rows), unit="s"))
+    approved[rng.random(rows) < 0.02] = pd.NaT
+    carrier = pd.Series(approved + pd.to_timedelta(rng.integers(-86400, 10 * 86400, size=rows), unit="s"))
+    carrier[rng.random(rows) < 0.4] = pd.NaT
+    weight = rng.gamma(2.0, 800.0, size=rows)
+    weight[rng.random(rows) < 0.01] = np.nan
+    return pd.DataFrame({
+        'order_id': [f"{i:032x}" for i in rng.integers(0, rows // 2, size=rows)],
+        'order_purchase_timestamp': purchase,
+        'order_approved_at': approved,
+        'order_delivered_carrier_date': carrier,
+        'price': rng.gamma(2.0, 60.0, size=rows).round(2),
+        'freight_value': rng.gamma(2.0, 10.0, size=rows).round(2),
+        'product_weight_g': weight,
+        'volume_cm3': rng.gamma(2.0, 5000.0, size=rows),
+        'product_category_name': categories[rng.integers(0, len(categories), size=rows)],
+        'geolocation_lat_cust': rng.normal(-23.5, 4.0, size=rows),
+        'geolocation_lng_cust': rng.normal(-46.6, 4.0, size=rows),
+        'customer_state': states[rng.integers(0, len(states), size=rows)],
+        'geolocation_lat_sell': rng.normal(-23.5, 2.0, size=rows),
+        'geolocation_lng_sell': rng.normal(-46.6, 2.0, size=rows),
+        'seller_state': states[rng.integers(0, len(states), size=rows)],
+    })
+
+
+def legacy_features(df, route_risk, category_risk, features, agora):
+    """Feature engineering como era feita em run_inference antes de features.py."""
+    df = df.copy()
+    df['distancia_km'] = haversine_distance(df['geolocation_lat_cust'], df['geolocation_lng_cust'],
+                                            df['geolocation_lat_sell'], df['geolocation_lng_sell'])
+    df['order_approved_at'] = pd.to_datetime(df['order_approved_at'])
+    df['order_delivered_carrier_date'] = pd.to_datetime(df['order_delivered_carrier_date'])
+    df['handling_time_h'] = (df['order_delivered_carrier_date'] - df['order_approved_at']).dt.total_seconds() / 3600
+    mask_pending = df['order_delivered_carrier_date'].isna()
+    df.loc[mask_pending, 'handling_time_h'] = (agora - df['order_approved_at']).dt.total_seconds() / 3600
+    df['handling_time_h'] = df['handling_time_h'].apply(lambda x: x if x >= 0 else 24).fillna(24)
+    df['order_purchase_timestamp'] = pd.to_datetime(df['order_purchase_timestamp'])
+    df['dia_semana_compra'] = df['order_purchase_timestamp'].dt.dayofweek
+    df['densidade_prod'] = df['product_weight_g'] / (df['volume_cm3'] + 1)
+    df['route_key'] = df['seller_state'] + "_" + df['customer_state']
+    df['risk_route'] = df['route_key'].map(route_risk).fillna(0.07)
+    df['risk_category'] = df['product_category_name'].map(category_risk).fillna(0.07)
+    return df[features].fillna(0).to_numpy(dtype=float)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with open(MODEL_DIR / "route_risk.json") as f: route_risk = json.load(f)
+    with open(MODEL_DIR / "category_risk.json") as f: category_risk = json.load(f)
+    with open(MODEL_DIR / "model_config.json") as f: features = json.load(f)['features']
+
+    df = make_order_items(args.rows, route_risk, category_risk)
+    agora = df['order_purchase_timestamp'].max() + pd.Timedelta(days=1)
+    print(f"{len(df):,} itens sintéticos")
+
+    start = time.perf_counter()
+    expected = legacy_features(df, route_risk, category_risk, features, agora)
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lookups = build_risk_lookups(route_risk, category_risk)
+    result = build_feature_matrix(df, lookups, features, agora)
+    t_fast = time.perf_counter() - start
+
+    np.testing.assert_array_equal(expected, result)
+    print(f"pandas .apply/.map (original): {t_legacy:8.3f}s")
+    print(f"features.build_feature_matrix: {t_fast:8.3f}s  ({t_legacy / t_fast:.1f}x)")
+    print(f"Matrizes idênticas: {result.shape[0]:,} x {result.shape[1]} ({', '.join(features)})")
+
+
+if __name__ == "__main__":
+    main()
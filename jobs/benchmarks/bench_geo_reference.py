@@ -0,0 +1,76 @@
+"""Benchmark da moda por CEP em create_geo_reference: lambdas com value_counts x aggregate_geolocation.
+
+Uso:
+    python jobs/benchmarks/bench_geo_reference.py --minio        # tabela completa da Bronze
+    python jobs/benchmarks/bench_geo_reference.py --rows 1000000 # dados sintéticos
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "transformation"))
+from transform_silver import aggregate_geolocation, read_bronze  # noqa: E402
+
+KEY = 'geolocation_zip_code_prefix'
+
+
+def make_geolocation(rows, zips=19_000, seed=42):
+    """Geolocalização sintética: ~19 mil prefixos, grafias variadas e empates de contagem."""
+    rng = np.random.default_rng(seed)
+    zip_codes = rng.integers(1000, 99999, size=zips).astype(str)
+    zip_idx = rng.integers(0, zips, size=rows)
+    spellings = np.array(["sao paulo", "são paulo", "sp", "rio de janeiro", "rio janeiro",
+                          "belo horizonte", "bh", "curitiba", "curitba"], dtype=object)
+    states = np.array(["SP", "RJ", "MG", "PR"], dtype=object)
+    return pd.DataFrame({
+        KEY: pd.Series(zip_codes[zip_idx]).str.zfill(5),
+        'geolocation_lat': rng.normal(-23.5, 2.0, size=rows),
+        'geolocation_lng': rng.normal(-46.6, 2.0, size=rows),
+        'geolocation_city': spellings[(zip_idx + rng.integers(0, 2, size=rows)) % len(spellings)],
+        'geolocation_state': states[(zip_idx + (rng.random(rows) < 0.05)) % len(states)],
+    })
+
+
+def legacy_geo_reference(df):
+    agg_logic = {
+        'geolocation_city': lambda x: x.value_counts().index[0] if not x.empty else None,
+        'geolocation_state': lambda x: x.value_counts().index[0] if not x.empty else None,
+        'geolocation_lat': 'mean',
+        'geolocation_lng': 'mean'
+    }
+    return df.groupby(KEY).agg(agg_logic).reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--minio", action="store_true", help="usa olist_geolocation da Bronze")
+    args = parser.parse_args()
+
+    if args.minio:
+        df = read_bronze("olist_geolocation")
+        df[KEY] = df[KEY].astype(str).str.zfill(5)
+    else:
+        df = make_geolocation(args.rows)
+    print(f"{len(df):,} linhas, {df[KEY].nunique():,} CEPs")
+
+    start = time.perf_counter()
+    expected = legacy_geo_reference(df)
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = aggregate_geolocation(df)
+    t_fast = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(expected, result, check_dtype=False)
+    print(f"lambdas value_counts: {t_legacy:8.3f}s")
+    print(f"aggregate_geolocation: {t_fast:8.3f}s  ({t_legacy / t_fast:.1f}x)")
+    print("Resultados idênticos (inclusive desempates).")
+
+
+if __name__ == "__main__":
+    main()
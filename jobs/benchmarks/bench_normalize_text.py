@@ -0,0 +1,75 @@
+"""Equivalência e micro-benchmark: normalize_text (.apply) x normalize_series (vetorizada).
+
+Uso: python jobs/benchmarks/bench_normalize_text.py [--rows 1000000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "transformation"))
+import transform_silver  # noqa: E402
+from transform_silver import normalize_series, normalize_text  # noqa: E402
+
+# Cidades com acentos, siglas de UF e separadores, como aparecem nas bases da Olist
+CITY_SAMPLES = [
+    "São Paulo", "sao paulo", "SÃO PAULO - SP", "sao paulo/sp", "Rio de Janeiro", "rio de janeiro, rj",
+    "Belo Horizonte", "belo horizonte mg", "Brasília", "brasilia df", "Curitiba", "curitiba - pr",
+    "Florianópolis", "florianopolis/sc", "Porto Alegre", "porto alegre rs", "Goiânia", "goiania go",
+    "Salvador", "salvador-ba", "Recife", "recife pe", "Fortaleza", "fortaleza  ce", "Belém", "belem pa",
+    "Manaus", "manaus/am", "São José dos Campos", "sao jose dos campos", "Ribeirão Preto",
+    "ribeirao preto sp", "Mogi das Cruzes", "mogi-das-cruzes", "Embu-Guaçu", "embu guacu",
+    "Santa Bárbara d'Oeste", "santa barbara d oeste", "Lençóis Paulista", "lencois paulista",
+    "Jaboatão dos Guararapes", "Itaú de Minas", "Açailândia", "Xique-Xique", "Pau D'Arco",
+    "  quatro   barras  ", "Paraty rj", "arraial d'ajuda", "Ji-Paraná", "Rio Branco, AC",
+]
+
+
+def make_cities(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    # Variantes com sufixos numéricos elevam a cardinalidade para a ordem real (~8 mil cidades)
+    pool = CITY_SAMPLES + [f"{city} {i}" for i in range(160) for city in CITY_SAMPLES[:50]]
+    # Distribuição com cauda longa (poucas capitais concentram a maior parte dos pedidos)
+    weights = 1.0 / np.arange(1, len(pool) + 1) ** 0.8
+    values = rng.choice(np.array(pool, dtype=object), size=rows, p=weights / weights.sum())
+    values[rng.random(rows) < 0.01] = None
+    return pd.Series(values, dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    cities = make_cities(args.rows)
+    print(f"{len(cities):,} cidades, {cities.nunique():,} valores únicos")
+
+    start = time.perf_counter()
+    expected = cities.apply(normalize_text)
+    t_apply = time.perf_counter() - start
+
+    transform_silver._normalize_cache.clear()
+    start = time.perf_counter()
+    result = normalize_series(cities)
+    t_cold = time.perf_counter() - start
+
+    # Segunda chamada: todos os valores já estão no cache da execução
+    start = time.perf_counter()
+    normalize_series(cities)
+    t_warm = time.perf_counter() - start
+
+    mismatches = (expected.fillna("<null>") != result.fillna("<null>")).sum()
+    assert mismatches == 0, f"{mismatches} valores divergentes"
+    assert result[cities.isna()].map(lambda v: v is None).all(), "nulos devem virar None"
+
+    print(f".apply(normalize_text): {t_apply:8.3f}s")
+    print(f"normalize_series (cache frio): {t_cold:8.3f}s  ({t_apply / t_cold:.1f}x)")
+    print(f"normalize_series (cache quente): {t_warm:8.3f}s  ({t_apply / t_warm:.1f}x)")
+    print("Resultados idênticos.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Relatório do layout Parquet: padrões do pandas (saída atual) x política por tabela (common/parquet_policy.py).
+
+Para cada tabela grava as duas versões em disco e compara tamanho, tempo de escrita, leitura
+completa e uma leitura filtrada pela chave de ordenação da política (recorte recente para datas,
+5 IDs sorteados para chaves texto), com os row groups que sobram após o pruning por estatísticas.
+Confere também que as duas versões têm o mesmo conteúdo.
+
+Uso:
+    python jobs/benchmarks/bench_parquet_layout.py --scale 1 --layer silver
+    python jobs/benchmarks/bench_parquet_layout.py --minio --layer gold     # tabelas atuais do bucket
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.parquet_policy import parquet_policy, write_parquet  # noqa: E402
+from synthetic_olist import generate_olist  # noqa: E402
+
+MINIO_TABLES = {
+    "bronze": ["olist_orders", "olist_order_items", "olist_order_payments", "olist_products", "olist_customers",
+               "olist_sellers", "olist_order_reviews", "olist_geolocation"],
+    "silver": ["olist_orders", "olist_order_items", "olist_order_payments", "olist_products", "olist_customers",
+               "olist_sellers", "olist_order_reviews", "olist_geolocation_ref"],
+    "gold": ["fato_vendas", "fato_pagamentos", "fato_reviews", "dim_clientes", "dim_produtos", "dim_vendedores"],
+}
+
+
+def synthetic_tables(scale, seed):
+    frames = {}
+    for table_name, df in generate_olist(scale, seed):
+        frames.setdefault(table_name, []).append(df)
+    return {name: pd.concat(parts, ignore_index=True) for name, parts in frames.items()}
+
+
+def minio_tables(layer):
+    from common.silver_cache import storage_options
+    return {name: pd.read_parquet(f"s3://{layer}/{name}/{name}.parquet", storage_options=storage_options)
+            for name in MINIO_TABLES[layer]}
+
+
+def probe_filter(df, column, rng):
+    """Filtro típico sobre a chave: 5% mais recentes/maiores ou busca pontual de 5 valores sorteados."""
+    values = df[column].dropna()
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+        threshold = values.quantile(0.95)
+        return ds.field(column) >= threshold, f"{column} >= p95"
+    sample = rng.choice(values.unique(), size=min(5, values.nunique()), replace=False).tolist()
+    return ds.field(column).isin(sample), f"{column} in 5 valores"
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def measure(path, expr, repeat):
+    dataset = ds.dataset(path, format="parquet")
+    fragment = next(dataset.get_fragments())
+    groups_total = fragment.metadata.num_row_groups
+    groups_kept = len(fragment.split_by_row_group(filter=expr)) if expr is not None else groups_total
+    t_full, _ = timed(lambda: pq.read_table(path).to_pandas(), repeat)
+    t_filtered, filtered = timed(lambda: dataset.to_table(filter=expr).to_pandas(), repeat) if expr is not None else (None, None)
+    return {"size": Path(path).stat().st_size, "t_full": t_full, "t_filtered": t_filtered,
+            "groups": f"{groups_kept}/{groups_total}", "filtered_rows": None if filtered is None else len(filtered)}
+
+
+def same_content(a, b, keys):
+    """Mesmo conteúdo independente da ordem das linhas."""
+    if len(a) != len(b):
+        return False
+    keys = keys or list(a.columns)
+    a = a.sort_values(keys, kind="stable", ignore_index=True)
+    b = b.sort_values(keys, kind="stable", ignore_index=True)
+    return a.equals(b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--layer", choices=["bronze", "silver", "gold"], default="silver")
+    parser.add_argument("--minio", action="store_true", help="usa as tabelas atuais da camada no MinIO")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tables = minio_tables(args.layer) if args.minio else synthetic_tables(args.scale, args.seed)
+    if not args.minio and args.layer == "gold":
+        parser.error("--layer gold requer --minio (o gerador produz as tabelas da origem)")
+    rng = np.random.default_rng(args.seed)
+    totals = {"legacy": 0, "policy": 0}
+
+    print(f"Camada {args.layer}: padrões do pandas (legacy) x política por tabela")
+    print(f"{'tabela':<24} {'versão':<7} {'MB':>8} {'escrita':>8} {'leitura':>8} {'filtrada':>9} {'row groups':>11}  filtro")
+    with tempfile.TemporaryDirectory() as tmp:
+        for table_name, df in tables.items():
+            policy = parquet_policy(table_name, args.layer) or {}
+            keys = [c for c in policy.get("sort_by", []) if c in df.columns]
+            expr, label = probe_filter(df, keys[0], rng) if keys else (None, "-")
+            paths = {"legacy": Path(tmp) / f"{table_name}.legacy.parquet", "policy": Path(tmp) / f"{table_name}.parquet"}
+
+            t_legacy, _ = timed(lambda: df.to_parquet(paths["legacy"], index=False), 1)
+            t_policy, _ = timed(lambda: write_parquet(df, paths["policy"], table_name, args.layer), 1)
+            results = {"legacy": {**measure(paths["legacy"], expr, args.repeat), "t_write": t_legacy},
+                       "policy": {**measure(paths["policy"], expr, args.repeat), "t_write": t_policy}}
+            assert results["legacy"]["filtered_rows"] == results["policy"]["filtered_rows"], f"{table_name}: filtro divergente"
+            assert same_content(pd.read_parquet(paths["legacy"]), pd.read_parquet(paths["policy"]), keys), \
+                f"{table_name}: conteúdo divergente"
+
+            for version, r in results.items():
+                totals[version] += r["size"]
+                filtered = f"{r['t_filtered'] * 1000:7.1f}ms" if r["t_filtered"] is not None else f"{'-':>9}"
+                print(f"{table_name if version == 'legacy' else '':<24} {version:<7} {r['size'] / 1024**2:8.2f} "
+                      f"{r['t_write'] * 1000:6.0f}ms {r['t_full'] * 1000:6.0f}ms {filtered} {r['groups']:>11}  "
+                      f"{label if version == 'legacy' else ''}")
+
+    print(f"Total: {totals['legacy'] / 1024**2:.1f} MB -> {totals['policy'] / 1024**2:.1f} MB "
+          f"({1 - totals['policy'] / totals['legacy']:.0%} menor)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Paridade e benchmark do índice de distâncias por par de CEPs x haversine por linha.
+
+Simula itens cujas coordenadas vêm da média por CEP (como na Silver): poucos pares distintos
+(CEP vendedor, CEP cliente) para muitas linhas. Uma fração de rotas novas fica fora do índice
+e cai no cálculo por linha.
+
+Em NumPy o haversine vetorizado custa menos que o join (chave + busca binária), por isso
+predict_delay continua calculando por linha; o índice serve a consumidores sem trigonometria
+vetorizada (a distancia_km de fato_vendas na Gold, consultas SQL/BI). Rode de novo se a proporção linhas/rota ou o consumidor mudar.
+
+Uso: python jobs/benchmarks/bench_route_distance.py [--rows 1000000] [--new-routes 0.02]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.route_distance import (build_route_distances, haversine_distance, load_route_distance_index,  # noqa: E402
+                                   lookup_route_distance, route_distance_report, route_index_bytes)
+
+
+def make_routes(rows, customer_zips=15_000, seller_zips=2_000, seed=42):
+    """Itens com CEPs (5 dígitos) e coordenadas médias por CEP; vendedores concentrados em poucos CEPs."""
+    rng = np.random.default_rng(seed)
+
+    def zip_table(n, prefix):
+        zips = pd.Index(rng.choice(100_000, size=n, replace=False)).map(lambda z: f"{z:05d}")
+        lat = rng.normal(-23.5, 4.0, size=n)
+        lat[rng.random(n) < 0.005] = np.nan  # CEP sem referência geográfica
+        return pd.DataFrame({f'{prefix}_zip_code_prefix': zips, f'geolocation_lat_{prefix[:4]}': lat,
+                             f'geolocation_lng_{prefix[:4]}': rng.normal(-46.6, 4.0, size=n)})
+
+    customers = zip_table(customer_zips, 'customer')
+    sellers = zip_table(seller_zips, 'seller')
+    seller_weights = 1 / np.arange(1, seller_zips + 1) ** 1.1
+    seller_pos = rng.choice(seller_zips, size=rows, p=seller_weights / seller_weights.sum())
+    customer_pos = rng.integers(0, customer_zips, size=rows)
+    return pd.concat([customers.iloc[customer_pos].reset_index(drop=True),
+                      sellers.iloc[seller_pos].reset_index(drop=True)], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--new-routes", type=float, default=0.02,
+                        help="fração das linhas com rotas ausentes do índice")
+    args = parser.parse_args()
+
+    df = make_routes(args.rows)
+    known = np.random.default_rng(7).random(len(df)) >= args.new_routes
+
+    start = time.perf_counter()
+    index_table = build_route_distances(df[known])
+    t_build = time.perf_counter() - start
+    index = load_route_distance_index(index_table)
+    print(f"{len(df):,} itens, {len(index_table):,} rotas no índice "
+          f"({len(df) / max(len(index_table), 1):.1f} linhas por rota, {route_index_bytes(index) / 1024**2:.1f} MB), "
+          f"construído em {t_build:.2f}s")
+
+    start = time.perf_counter()
+    expected = haversine_distance(df['geolocation_lat_cust'].to_numpy(dtype=float),
+                                  df['geolocation_lng_cust'].to_numpy(dtype=float),
+                                  df['geolocation_lat_sell'].to_numpy(dtype=float),
+                                  df['geolocation_lng_sell'].to_numpy(dtype=float))
+    t_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = lookup_route_distance(index, df['seller_zip_code_prefix'], df['customer_zip_code_prefix'])
+    miss = np.isnan(result)
+    result[miss] = haversine_distance(*[df[c].to_numpy(dtype=float)[miss] for c in (
+        'geolocation_lat_cust', 'geolocation_lng_cust', 'geolocation_lat_sell', 'geolocation_lng_sell')])
+    t_index = time.perf_counter() - start
+
+    np.testing.assert_allclose(result, expected, rtol=1e-12, equal_nan=True)
+    print(f"haversine por linha:           {t_row:7.3f}s")
+    print(f"índice + haversine nas faltas: {t_index:7.3f}s  ({t_row / t_index:.2f}x)")
+    route_distance_report()
+    print(f"Distâncias equivalentes em {len(df):,} linhas "
+          f"({np.mean(result == expected):.2%} bit a bit idênticas fora dos nulos)")
+
+
+if __name__ == "__main__":
+    main()
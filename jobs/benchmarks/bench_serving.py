@@ -0,0 +1,95 @@
+"""Benchmark de latência do serviço de pontuação (jobs/ml/serve_model.py): p50/p99 por requisição.
+
+Monta as requisições a partir dos pedidos em andamento da Silver e mede, numa conexão keep-alive,
+pedidos avulsos e micro-lotes de --batch-size pedidos. O serviço precisa estar no ar.
+
+Uso:
+    python jobs/ml/serve_model.py --port 8765 &
+    python jobs/benchmarks/bench_serving.py --url http://127.0.0.1:8765 --requests 2000 --batch-size 50
+"""
+import argparse
+import http.client
+import json
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+import pyarrow.compute as pc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "ml"))
+from common.silver_cache import read_silver  # noqa: E402
+from predict_delay import IN_FLIGHT_STATUSES, ORDER_COLUMNS, ITEM_COLUMNS  # noqa: E402
+
+
+def build_payloads(limit):
+    """Pedidos em andamento no formato do POST /score (até `limit` pedidos)."""
+    orders = read_silver("olist_orders", columns=ORDER_COLUMNS,
+                         filters=pc.field('order_status').isin(IN_FLIGHT_STATUSES)).head(limit)
+    items = read_silver("olist_order_items", columns=ITEM_COLUMNS,
+                        filters=pc.field('order_id').isin(orders['order_id'].unique()))
+    items_by_order = {
+        order_id: group.drop(columns='order_id').to_dict('records')
+        for order_id, group in items.groupby('order_id')
+    }
+    payloads = []
+    for order in orders.to_dict('records'):
+        for field in ['order_purchase_timestamp', 'order_approved_at', 'order_delivered_carrier_date']:
+            order[field] = None if order[field] is None or order[field] != order[field] else str(order[field])
+        order['items'] = items_by_order.get(order['order_id'], [])
+        payloads.append(order)
+    return payloads
+
+
+def measure(conn, bodies):
+    latencies = []
+    for body in bodies:
+        start = time.perf_counter()
+        conn.request("POST", "/score", body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        data = response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status == 200, data
+    return np.array(latencies)
+
+
+def report(label, latencies, orders_per_request):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    throughput = orders_per_request * len(latencies) / (latencies.sum() / 1000)
+    print(f"{label:<22} p50 {p50:7.2f} ms | p99 {p99:7.2f} ms | {throughput:,.0f} pedidos/s ({len(latencies)} req.)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--requests", type=int, default=2000, help="requisições por cenário")
+    parser.add_argument("--batch-size", type=int, default=50, help="pedidos por micro-lote")
+    parser.add_argument("--warmup", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = build_payloads(max(args.requests, args.batch_size * 10))
+    if not payloads:
+        print("Nenhum pedido em andamento na Silver para montar as requisições.")
+        return
+    print(f"{len(payloads)} pedidos em andamento disponíveis")
+
+    single = [json.dumps(payloads[i % len(payloads)]) for i in range(args.requests)]
+    batched = [
+        json.dumps({'orders': [payloads[(i * args.batch_size + j) % len(payloads)] for j in range(args.batch_size)]})
+        for i in range(args.requests)
+    ]
+
+    url = urlparse(args.url)
+    conn = http.client.HTTPConnection(url.hostname, url.port)
+    try:
+        measure(conn, single[:args.warmup])
+        report("pedido avulso", measure(conn, single), 1)
+        report(f"micro-lote ({args.batch_size})", measure(conn, batched), args.batch_size)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Paridade e memória dos tipos compactos (common/dtypes.py): OLIST_DTYPES=legacy x compact.
+
+Sobre a mesma Bronze sintética, roda a Silver e monta as tabelas Gold (create_dim_calendario,
+create_dimensions e create_facts) uma vez em cada modo, capturando o que seria publicado em vez
+de gravar no DW. Para cada tabela Gold compara o texto que o COPY enviaria ao Postgres (mesmas
+colunas e conversões de copy_to_postgres, com os tipos do DDL em postgres/init) e imprime a
+memória (deep) das tabelas lidas da Silver e das publicadas em cada modo. Sai com erro se
+alguma tabela divergir.
+
+Usa buckets bronze/silver/gold do endpoint informado: MinIO descartável, nunca o do ambiente.
+
+Uso:
+    python jobs/benchmarks/check_dtypes_parity.py --scale 1 --s3-endpoint http://localhost:9100
+"""
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from bench_pipeline import JOBS_DIR, REPO_DIR, SILVER_STEP_NAMES, STAGES, stage_env
+
+DW_DDL = [REPO_DIR / "postgres" / "init" / "create_gold_dw.sql"]
+MODES = ["legacy", "compact"]
+
+
+def dw_column_types():
+    """{tabela: {coluna: tipo}} a partir dos CREATE TABLE do DW."""
+    tables = {}
+    for path in DW_DDL:
+        for name, body in re.findall(r"CREATE TABLE IF NOT EXISTS (\w+) \((.*?)\n\)", path.read_text(), re.S):
+            tables[name] = {col: col_type.upper() for col, col_type in re.findall(r"^\s*(\w+)\s+(\w+)", body, re.M)
+                            if col.upper() not in ("PRIMARY", "CONSTRAINT")}
+    return tables
+
+
+def copy_payload(df, target_types):
+    """CSV enviado por copy_to_postgres: colunas do destino, float -> Int64 em colunas inteiras."""
+    cols = [c for c in df.columns if c in target_types]
+    int_cols = [c for c in cols if target_types[c] in ("SMALLINT", "INTEGER", "BIGINT") and df[c].dtype.kind == "f"]
+    return df[cols].astype({c: "Int64" for c in int_cols}).to_csv(index=False, header=False, na_rep="\\N")
+
+
+def run_silver(config):
+    from common.dtypes import memory_stats
+    for step_name in SILVER_STEP_NAMES:
+        STAGES[f"silver.{step_name}"](config)
+    return dict(memory_stats)
+
+
+def run_gold(config, out_dir):
+    """Monta as tabelas Gold sem DW; grava o payload do COPY de cada uma em out_dir."""
+    import transform_gold as gold
+    from common.dtypes import compact_dtypes, memory_stats
+
+    dw_types = dw_column_types()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    def capture(df, table_name):
+        df = compact_dtypes(df, table_name)
+        (out_dir / f"{table_name}.csv").write_text(copy_payload(df, dw_types[table_name]))
+
+    gold.publish = capture
+    gold.create_dim_calendario()
+    gold.create_dimensions()
+    gold.create_facts()
+    return dict(memory_stats)
+
+
+def in_child(fn, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--s3-endpoint", required=True, help="MinIO/S3 local descartável")
+    parser.add_argument("--workdir", default="/tmp/olist_dtypes_parity")
+    parser.add_argument("--reuse-source", action="store_true", help="não regera origem e Bronze (mesma escala/seed)")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    config = {
+        "scale": args.scale, "seed": args.seed, "s3_endpoint": args.s3_endpoint,
+        "source_dsn": f"sqlite:///{workdir / f'source_sf{args.scale:g}_seed{args.seed}.db'}",
+        # O DW não é usado (publish é capturado), mas o módulo Gold cria o engine na importação
+        "dw_dsn": f"sqlite:///{workdir / 'dw_unused.db'}",
+        "model_dir": str(JOBS_DIR / "ml" / "models"), "workdir": str(workdir), "profile": "",
+    }
+
+    import boto3
+    s3 = boto3.client("s3", endpoint_url=args.s3_endpoint, aws_access_key_id="admin",
+                      aws_secret_access_key="admin12345", region_name="us-east-1")
+    existing = {b["Name"] for b in s3.list_buckets()["Buckets"]}
+    for bucket in ["bronze", "silver", "gold"]:
+        if bucket not in existing:
+            s3.create_bucket(Bucket=bucket)
+
+    os.environ.update(stage_env(config, "dtypes_parity"))
+    if not args.reuse_source:
+        print("Gerando origem sintética e Bronze...")
+        for stage in ["source", "bronze"]:
+            in_child(STAGES[stage], config)
+
+    memory = {}
+    for mode in MODES:
+        print(f"Modo {mode}: Silver e Gold...")
+        os.environ["OLIST_DTYPES"] = mode
+        # Cache Silver separado por modo: a Silver é regravada e o Parquet muda de tipos
+        os.environ["OLIST_SILVER_CACHE_DIR"] = str(workdir / f"silver_cache_{mode}")
+        silver = in_child(run_silver, config)
+        gold = in_child(run_gold, config, str(workdir / mode))
+        memory[mode] = {"silver": silver, "gold": gold}
+
+    diverging = []
+    print(f"\n{'tabela Gold':<24} {'linhas':>9} {'COPY':>10}")
+    for path in sorted((workdir / "legacy").glob("*.csv")):
+        legacy, compact = path.read_text(), (workdir / "compact" / path.name).read_text()
+        same = legacy == compact
+        if not same:
+            diverging.append(path.stem)
+        print(f"{path.stem:<24} {legacy.count(chr(10)):>9,} {'igual' if same else 'DIVERGE':>10}")
+
+    for layer, label in [("gold", "lidas da Silver pela Gold e publicadas"), ("silver", "gravadas pela Silver")]:
+        print(f"\nMemória (MB) das tabelas {label}")
+        print(f"{'tabela':<28} {'legacy':>9} {'compact':>9} {'redução':>8}")
+        before, after = memory["legacy"][layer], memory["compact"][layer]
+        for table_name in sorted(before, key=lambda t: -before[t]):
+            b, a = before[table_name], after.get(table_name, 0)
+            print(f"{table_name:<28} {b / 1024**2:9.1f} {a / 1024**2:9.1f} {1 - a / b if b else 0:8.0%}")
+        b, a = sum(before.values()), sum(after.values())
+        print(f"{'total':<28} {b / 1024**2:9.1f} {a / 1024**2:9.1f} {1 - a / b if b else 0:8.0%}")
+
+    if diverging:
+        print(f"\nTabelas Gold divergentes: {', '.join(diverging)}")
+        sys.exit(1)
+    print("\nSaída Gold idêntica nos dois modos.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Paridade dos motores de Silver/Gold (common/duckdb_engine.py): OLIST_ENGINE=pandas x duckdb.
+
+Sobre a mesma Bronze sintética, roda as etapas da Silver e monta as tabelas Gold
+(create_dim_calendario, create_dimensions e create_facts) uma vez com cada motor, capturando o
+que seria carregado (todos os lotes) em vez de gravar no DW. Compara tabela a tabela os Parquet
+gravados na Silver e na Gold e o conteúdo carregado no DW (ordenado pela PK): mesmas colunas,
+tipos, linhas e ordem; valores não float idênticos e float com diferença relativa até --rtol
+(médias somadas em outra ordem). Os Parquet são lidos com common/dtypes.arrow_to_pandas, já
+que os gravados pelo DuckDB não levam os metadados do pandas.
+Imprime também o tempo de cada motor. Sai com erro se alguma tabela divergir.
+
+Usa buckets bronze/silver/gold do endpoint informado: MinIO descartável, nunca o do ambiente.
+
+Uso:
+    python jobs/benchmarks/check_engine_parity.py --scale 1 --s3-endpoint http://localhost:9100
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from bench_pipeline import JOBS_DIR, SILVER_STEP_NAMES, STAGES, stage_env
+from check_dtypes_parity import in_child
+
+ENGINES = ["pandas", "duckdb"]
+
+
+def download_layer(bucket, out_dir):
+    """Copia para out_dir o Parquet de cada tabela do bucket."""
+    import s3fs
+    from transform_silver import storage_options
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fs = s3fs.S3FileSystem(**storage_options)
+    fs.invalidate_cache()
+    for path in fs.glob(f"{bucket}/*/*.parquet"):
+        fs.get(path, str(out_dir / Path(path).name))
+
+
+def run_silver(config, out_dir):
+    """Etapas da Silver; copia o Parquet de cada tabela gravada para out_dir/silver."""
+    for step_name in SILVER_STEP_NAMES:
+        STAGES[f"silver.{step_name}"](config)
+    download_layer("silver", Path(out_dir) / "silver")
+
+
+def run_gold(config, out_dir):
+    """Monta as tabelas Gold sem DW: copia a Gold para out_dir/gold e grava em out_dir/dw todos
+    os lotes que cada tabela carregaria, juntos e ordenados pela PK."""
+    import transform_gold as gold
+    from common.dtypes import compact_dtypes
+
+    dw_dir = Path(out_dir) / "dw"
+    dw_dir.mkdir(parents=True, exist_ok=True)
+
+    def capture(df, table_name, batches=None, **kwargs):
+        frames = list(batches()) if batches else [df]
+        loaded = pd.concat(frames, ignore_index=True).sort_values(gold.TABLE_KEYS[table_name], kind="stable", ignore_index=True)
+        compact_dtypes(loaded).to_parquet(dw_dir / f"{table_name}.parquet", index=False)
+
+    gold.save_to_postgres = capture
+    gold.create_dim_calendario()
+    gold.create_dimensions()
+    gold.create_facts()
+    download_layer(gold.GOLD_BUCKET, Path(out_dir) / "gold")
+
+
+def read_table(path):
+    from common.dtypes import arrow_to_pandas
+    return arrow_to_pandas(pq.read_table(path))
+
+
+def compare(expected, actual, rtol):
+    """None se as tabelas forem equivalentes; senão, a primeira diferença encontrada."""
+    if list(expected.columns) != list(actual.columns):
+        return f"colunas {list(expected.columns)} x {list(actual.columns)}"
+    if len(expected) != len(actual):
+        return f"{len(expected):,} x {len(actual):,} linhas"
+    for col in expected.columns:
+        # Categóricos: só o tipo (o arquivo do pandas guarda também categorias sem uso)
+        if str(expected[col].dtype) != str(actual[col].dtype):
+            return f"{col}: tipo {expected[col].dtype} x {actual[col].dtype}"
+    try:
+        pd.testing.assert_frame_equal(expected, actual, check_exact=False, rtol=rtol, atol=0,
+                                      check_categorical=False)
+    except AssertionError as e:
+        return str(e).splitlines()[0] + " " + " ".join(str(e).split())[-200:]
+    return None
+
+
+def max_float_diff(expected, actual):
+    cols = [c for c in expected.columns if expected[c].dtype.kind == "f"]
+    if not cols:
+        return 0.0
+    return float((expected[cols] - actual[cols]).abs().max().max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--s3-endpoint", required=True, help="MinIO/S3 local descartável")
+    parser.add_argument("--workdir", default="/tmp/olist_engine_parity")
+    parser.add_argument("--reuse-source", action="store_true", help="não regera origem e Bronze (mesma escala/seed)")
+    parser.add_argument("--rtol", type=float, default=1e-12, help="tolerância relativa das colunas float")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    config = {
+        "scale": args.scale, "seed": args.seed, "s3_endpoint": args.s3_endpoint,
+        "source_dsn": f"sqlite:///{workdir / f'source_sf{args.scale:g}_seed{args.seed}.db'}",
+        # O DW não é usado (save_to_postgres é capturado), mas o módulo Gold cria o engine na importação
+        "dw_dsn": f"sqlite:///{workdir / 'dw_unused.db'}",
+        "model_dir": str(JOBS_DIR / "ml" / "models"), "workdir": str(workdir), "profile": "",
+    }
+
+    import boto3
+    s3 = boto3.client("s3", endpoint_url=args.s3_endpoint, aws_access_key_id="admin",
+                      aws_secret_access_key="admin12345", region_name="us-east-1")
+    existing = {b["Name"] for b in s3.list_buckets()["Buckets"]}
+    for bucket in ["bronze", "silver", "gold"]:
+        if bucket not in existing:
+            s3.create_bucket(Bucket=bucket)
+
+    os.environ.update(stage_env(config, "engine_parity"))
+    if not args.reuse_source:
+        print("Gerando origem sintética e Bronze...")
+        for stage in ["source", "bronze"]:
+            in_child(STAGES[stage], config)
+
+    timings = {}
+    for engine in ENGINES:
+        print(f"Motor {engine}: Silver e Gold...")
+        os.environ["OLIST_ENGINE"] = engine
+        # Cache Silver separado por motor: a Gold do pandas não pode ler arquivos da execução anterior
+        os.environ["OLIST_SILVER_CACHE_DIR"] = str(workdir / f"silver_cache_{engine}")
+        start = time.perf_counter()
+        in_child(run_silver, config, str(workdir / engine))
+        silver_s = time.perf_counter() - start
+        start = time.perf_counter()
+        in_child(run_gold, config, str(workdir / engine))
+        timings[engine] = (silver_s, time.perf_counter() - start)
+
+    diverging = []
+    print(f"\n{'tabela':<36} {'linhas':>9} {'máx. dif. float':>16} {'resultado':>10}")
+    for layer in ["silver", "gold", "dw"]:
+        for path in sorted((workdir / "pandas" / layer).glob("*.parquet")):
+            name = f"{layer}.{path.stem}"
+            other = workdir / "duckdb" / layer / path.name
+            expected = read_table(path)
+            if not other.exists():
+                diverging.append(name)
+                print(f"{name:<36} {len(expected):>9,} {'':>16} {'AUSENTE':>10}")
+                continue
+            actual = read_table(other)
+            problem = compare(expected, actual, args.rtol)
+            diff = max_float_diff(expected, actual) if problem is None else float("nan")
+            print(f"{name:<36} {len(expected):>9,} {diff:>16.2e} {'igual' if problem is None else 'DIVERGE':>10}")
+            if problem:
+                diverging.append(name)
+                print(f"   {problem}")
+
+    print(f"\n{'motor':<8} {'Silver (s)':>11} {'Gold (s)':>9}")
+    for engine, (silver_s, gold_s) in timings.items():
+        print(f"{engine:<8} {silver_s:11.1f} {gold_s:9.1f}")
+
+    if diverging:
+        print(f"\nTabelas divergentes: {', '.join(diverging)}")
+        sys.exit(1)
+    print("\nSilver, Gold e carga no DW idênticas nos dois motores.")
+
+
+if __name__ == "__main__":
+    main()
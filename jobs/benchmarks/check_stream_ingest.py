@@ -0,0 +1,133 @@
+"""Paridade da ingestão Bronze em streaming (ingest_bronze --mode stream) com a leitura completa.
+
+Monta uma origem SQLite pequena com os casos que quebram um schema tirado só do 1º lote:
+colunas numéricas, de texto e de data 100% nulas nos primeiros lotes e com valores depois
+(produtos e avaliações esparsos). Ingere cada tabela com ingest_table_streaming (lotes de
+--batch-size linhas) e com ingest_table, e compara os dois Parquet da Bronze: mesmas linhas,
+mesmos nulos e mesmos valores. Sai com erro se a ingestão falhar ou os arquivos divergirem.
+
+Usa o bucket bronze do endpoint informado: MinIO descartável, nunca o do ambiente.
+
+Uso:
+    python jobs/benchmarks/check_stream_ingest.py --s3-endpoint http://localhost:9100
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+JOBS_DIR = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(JOBS_DIR), str(JOBS_DIR / "ingestion")]
+
+LEADING_NULLS = 10
+
+
+def sparse_products(n=23):
+    """Produtos cujas primeiras LEADING_NULLS linhas não têm categoria nem medidas."""
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        "product_id": [f"p{i:031d}" for i in range(n)],
+        "product_category_name": rng.choice(["beleza_saude", "esporte_lazer"], n).astype(object),
+        "product_name_length": rng.integers(10, 60, n).astype(float),
+        "product_description_length": rng.integers(50, 900, n).astype(float),
+        "product_photos_qty": rng.integers(1, 6, n).astype(float),
+        "product_weight_g": rng.integers(100, 5000, n).astype(float),
+        "product_length_cm": rng.integers(10, 60, n).astype(float),
+        "product_height_cm": rng.integers(2, 40, n).astype(float),
+        "product_width_cm": rng.integers(10, 40, n).astype(float),
+    })
+    df.iloc[:LEADING_NULLS, 1:] = None
+    return df
+
+
+def sparse_reviews(n=17):
+    """Avaliações cujas primeiras LEADING_NULLS linhas não têm comentário nem resposta."""
+    created = pd.Timestamp("2018-01-01") + pd.to_timedelta(np.arange(n), unit="D")
+    df = pd.DataFrame({
+        "review_id": [f"r{i:031d}" for i in range(n)],
+        "order_id": [f"o{i:031d}" for i in range(n)],
+        "review_score": np.arange(n) % 5 + 1,
+        "review_comment_title": None,
+        "review_comment_message": [f"comentario {i}" for i in range(n)],
+        "review_creation_date": created,
+        "review_answer_timestamp": created + pd.Timedelta(hours=30),
+    })
+    df["review_answer_timestamp"] = df["review_answer_timestamp"].astype(object)
+    df.loc[:LEADING_NULLS - 1, ["review_comment_message", "review_answer_timestamp"]] = None
+    return df
+
+
+def same_values(expected, actual):
+    """None se os DataFrames têm as mesmas linhas, nulos e valores (comparados como texto ou data)."""
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        return f"formato {expected.shape} x {actual.shape}"
+    for col in expected.columns:
+        if col == "ingestion_date":
+            continue
+        if not (expected[col].isna().to_numpy() == actual[col].isna().to_numpy()).all():
+            return f"{col}: nulos diferentes"
+        left, right = expected[col], actual[col]
+        if pd.api.types.is_datetime64_any_dtype(left) or pd.api.types.is_datetime64_any_dtype(right):
+            # SQLite devolve DATETIME como texto; o schema da origem tipa a coluna nula como timestamp
+            left, right = pd.to_datetime(left), pd.to_datetime(right)
+        mask = left.notna().to_numpy()
+        if left[mask].astype(str).tolist() != right[mask].astype(str).tolist():
+            return f"{col}: valores diferentes"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--s3-endpoint", required=True, help="MinIO/S3 local descartável")
+    parser.add_argument("--workdir", default="/tmp/olist_stream_check")
+    parser.add_argument("--batch-size", type=int, default=5, help="linhas por lote (menor que LEADING_NULLS)")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.environ["OLIST_MINIO_ENDPOINT"] = args.s3_endpoint
+    from sqlalchemy import create_engine
+    import ingest_bronze
+
+    engine = create_engine(f"sqlite:///{workdir / 'source.db'}")
+    tables = {"olist_products": sparse_products(), "olist_order_reviews": sparse_reviews()}
+    for table_name, df in tables.items():
+        df.to_sql(table_name, engine, if_exists="replace", index=False)
+
+    s3_client = ingest_bronze.get_minio_client()
+    if "bronze" not in {b["Name"] for b in s3_client.list_buckets()["Buckets"]}:
+        s3_client.create_bucket(Bucket="bronze")
+    storage_options = {"key": ingest_bronze.MINIO_ACCESS_KEY, "secret": ingest_bronze.MINIO_SECRET_KEY,
+                       "client_kwargs": {"endpoint_url": args.s3_endpoint}}
+
+    failed = []
+    for table_name in tables:
+        path = f"s3://bronze/{table_name}/{table_name}.parquet"
+        outputs = {}
+        for mode, ingest in [("stream", ingest_bronze.ingest_table_streaming), ("full", ingest_bronze.ingest_table)]:
+            kwargs = {"batch_size": args.batch_size} if mode == "stream" else {}
+            if not ingest(table_name, engine=engine, s3_client=s3_client, **kwargs):
+                outputs[mode] = None
+                continue
+            outputs[mode] = pd.read_parquet(path, storage_options=storage_options)
+
+        if outputs["stream"] is None or outputs["full"] is None:
+            problem = "ingestão falhou"
+        else:
+            problem = same_values(outputs["full"], outputs["stream"])
+        print(f"{table_name:<24} {LEADING_NULLS} linhas nulas no início, lotes de {args.batch_size}: "
+              f"{'igual' if problem is None else 'DIVERGE (' + problem + ')'}")
+        if problem:
+            failed.append(table_name)
+
+    if failed:
+        print(f"\nTabelas divergentes: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nStreaming e leitura completa geram a mesma Bronze.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Tipos compactos das colunas de Silver/Gold, aplicados na leitura (read_silver, lotes da inferência)
+# e na escrita (save_to_minio/publish). OLIST_DTYPES=legacy mantém os tipos padrão do pandas.
+DTYPES_MODE = os.environ.get("OLIST_DTYPES", "compact")
+
+# IDs hexadecimais de 32 caracteres: string Arrow (buffer contíguo) em vez de objetos Python.
+# Categórico não serve aqui: cada tabela teria categorias próprias e os merges voltariam a object.
+ID_DTYPE = pd.StringDtype("pyarrow")
+ID_COLUMNS = {"order_id", "customer_id", "customer_unique_id", "product_id", "seller_id", "review_id"}
+
+# Baixa cardinalidade (UFs, status, categorias, cidades): categórico
+CATEGORY_COLUMNS = {"order_status", "payment_type", "product_category_name", "regiao", "nome_dia",
+                    "customer_state", "seller_state", "geolocation_state",
+                    "customer_city", "seller_city", "geolocation_city", "geolocation_city_normalized",
+                    "city_final", "location_full"}
+
+# Inteiros pequenos e flags. Flags que vão para colunas INTEGER do DW ficam int8 (o COPY enviaria
+# True/False para bool); com nulos, um inteiro numpy vira o equivalente anulável (int16 -> Int16).
+INTEGER_COLUMNS = {
+    "is_delayed": "int8",
+    "has_comment": "bool",
+    "is_fim_de_semana": "int8",
+    "order_item_id": "int16",
+    "payment_sequential": "int16",
+    "payment_installments": "int16",
+    "review_score": "int8",
+    "fk_data_venda": "int32",
+    "id_data": "int32",
+    "delivery_days": "Int32",
+    "delay_diff_days": "Int32",
+}
+
+# Memória (bytes, deep) de cada tabela nos tipos em uso, para o relatório do job
+memory_stats = {}
+
+
+def _nullable(dtype):
+    return {"int8": "Int8", "int16": "Int16", "int32": "Int32", "int64": "Int64", "bool": "boolean"}.get(dtype, dtype)
+
+
+def _to_integer(series, dtype):
+    """Converte para `dtype` só se não houver perda (float com fração fica como está)."""
+    if series.dtype.kind == "f":
+        values = series.dropna()
+        if ((values % 1) != 0).any():
+            logging.warning(f"{series.name}: valores fracionários, mantido como {series.dtype}")
+            return series
+    if series.hasnans:
+        dtype = _nullable(dtype)
+    return series.astype(dtype)
+
+
+def _convert(df):
+    conversions = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if col in ID_COLUMNS and dtype != ID_DTYPE:
+            conversions[col] = df[col].astype(ID_DTYPE)
+        elif col in CATEGORY_COLUMNS and not isinstance(dtype, pd.CategoricalDtype):
+            conversions[col] = df[col].astype("category")
+        elif col in INTEGER_COLUMNS and str(dtype) not in (INTEGER_COLUMNS[col], _nullable(INTEGER_COLUMNS[col])):
+            conversions[col] = _to_integer(df[col], INTEGER_COLUMNS[col])
+    return df.assign(**conversions) if conversions else df
+
+
+def compact_dtypes(df, table_name=None):
+    """DataFrame com os tipos compactos do esquema acima (colunas fora do esquema não mudam).
+
+    Com `table_name`, registra a memória da tabela para o memory_report (também no modo legacy).
+    """
+    if DTYPES_MODE != "legacy":
+        df = _convert(df)
+    if table_name:
+        memory_stats[table_name] = int(df.memory_usage(index=False, deep=True).sum())
+    return df
+
+
+def arrow_to_pandas(table, table_name=None):
+    """table.to_pandas() já nos tipos compactos, sem materializar IDs e categorias como objetos Python."""
+    if DTYPES_MODE == "legacy":
+        return compact_dtypes(table.to_pandas(), table_name)
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+
+    ids = []
+    for i, field in enumerate(table.schema):
+        is_text = pa.types.is_string(field.type) or pa.types.is_large_string(field.type)
+        if field.name in ID_COLUMNS and is_text:
+            ids.append(field.name)
+        elif field.name in CATEGORY_COLUMNS and is_text:
+            table = table.set_column(i, field.name, pc.dictionary_encode(table[field.name]))
+
+    df = table.select([name for name in table.column_names if name not in ids]).to_pandas()
+    for name in ids:
+        df[name] = pd.arrays.ArrowStringArray(table[name].cast(pa.string()))
+    return compact_dtypes(df[table.column_names], table_name)
+
+
+def row_hashes(df):
+    """Hash int64 de cada linha, o mesmo para o mesmo conteúdo em qualquer divisão em lotes.
+
+    Inteiros e flags entram no tipo anulável: um lote sem nulos (int32) e outro com nulos
+    (Int32) dão o mesmo hash para o mesmo valor.
+    """
+    nullable = {c: _nullable(str(dtype)) for c, dtype in df.dtypes.items()
+                if isinstance(dtype, np.dtype) and dtype.kind in "ib"}
+    return pd.util.hash_pandas_object(df.astype(nullable), index=False).to_numpy().view('int64')
+
+
+def memory_report():
+    """Memória ocupada por tabela (registrada por compact_dtypes/arrow_to_pandas)."""
+    if not memory_stats:
+        return {}
+    total = sum(memory_stats.values())
+    print(f"Memória dos DataFrames ({DTYPES_MODE}): {total / 1024**2:.1f} MB em {len(memory_stats)} tabela(s)")
+    for table_name, size in sorted(memory_stats.items(), key=lambda item: -item[1]):
+        print(f"   {table_name:<28} {size / 1024**2:8.1f} MB")
+    return dict(memory_stats)
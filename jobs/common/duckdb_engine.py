@@ -0,0 +1,122 @@
+import os
+import threading
+from pathlib import Path
+
+import pyarrow as pa
+import s3fs
+
+from common.dtypes import DTYPES_MODE, INTEGER_COLUMNS, arrow_to_pandas
+from common.parquet_policy import parquet_policy
+
+# Motor das transformações Silver/Gold: "pandas" (padrão) ou "duckdb" (SQL sobre os Parquet do MinIO,
+# multi-thread e com spill em disco). Escolhido por execução via --engine ou OLIST_ENGINE.
+#
+# No motor duckdb as tabelas não passam inteiras pelo pandas: o DuckDB grava os Parquet da Silver e
+# da Gold (copy_to_parquet) e a carga no DW recebe o resultado em lotes (iter_batches). O pico de
+# memória do job fica limitado pelo memory_limit do DuckDB e pelo tamanho do lote; só resultados
+# pequenos (referência de CEPs, valores distintos a normalizar) viram DataFrame inteiro.
+ENGINES = ["pandas", "duckdb"]
+ENGINE = os.environ.get("OLIST_ENGINE", "pandas")
+
+DUCKDB_THREADS = int(os.environ.get("OLIST_DUCKDB_THREADS", os.cpu_count() or 1))
+DUCKDB_MEMORY_LIMIT = os.environ.get("OLIST_DUCKDB_MEMORY_LIMIT", "4GB")
+DUCKDB_TEMP_DIR = Path(os.environ.get("OLIST_DUCKDB_TEMP_DIR", "/tmp/olist_duckdb"))
+# Linhas por lote entregue ao pandas (carga no DW)
+BATCH_ROWS = 100_000
+
+# Tipos compactos de common/dtypes.py nos Parquet gravados pelo DuckDB
+SQL_INTEGER_TYPES = {"int8": "TINYINT", "int16": "SMALLINT", "int32": "INTEGER", "Int32": "INTEGER", "bool": "BOOLEAN"}
+
+_database = None
+_lock = threading.Lock()
+
+
+def duckdb_cursor(storage_options):
+    """Cursor de uma base DuckDB em memória compartilhada pelo processo.
+
+    Etapas paralelas usam cursores da mesma base, então threads, memory_limit e o diretório de
+    spill valem para o job inteiro. O MinIO é acessado pelo s3fs registrado como filesystem
+    (s3://bucket/...), sem depender da extensão httpfs, que é baixada em tempo de execução.
+    """
+    global _database
+    with _lock:
+        if _database is None:
+            import duckdb  # dependência só do motor duckdb
+            DUCKDB_TEMP_DIR.mkdir(parents=True, exist_ok=True)
+            _database = duckdb.connect(config={
+                "threads": DUCKDB_THREADS,
+                "memory_limit": DUCKDB_MEMORY_LIMIT,
+                "temp_directory": str(DUCKDB_TEMP_DIR),
+            })
+            _database.register_filesystem(s3fs.S3FileSystem(**storage_options))
+        return _database.cursor()
+
+
+def parquet_scan(paths):
+    """read_parquet dos arquivos, na ordem dada, com nome do arquivo e posição da linha (para desempates)."""
+    files = ", ".join(f"'s3://{path}'" for path in paths)
+    return f"read_parquet([{files}], filename = true, file_row_number = true, union_by_name = true)"
+
+
+def file_order(paths):
+    """Índice do arquivo (posição em `paths`) a partir da coluna filename de parquet_scan."""
+    files = ", ".join(f"'s3://{path}'" for path in paths)
+    return f"list_position([{files}], filename)"
+
+
+def _signed_dictionaries(table):
+    # ENUM (categóricos registrados) chega com índices sem sinal, que o pyarrow não converte para pandas
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type) and not pa.types.is_signed_integer(field.type.index_type):
+            table = table.set_column(i, field.name, table[field.name].cast(pa.dictionary(pa.int32(), field.type.value_type)))
+    return table
+
+
+def fetch_df(cursor, sql, **params):
+    """Resultado (pequeno) da consulta como DataFrame, via Arrow."""
+    return _signed_dictionaries(cursor.execute(sql, params or None).fetch_arrow_table()).to_pandas()
+
+
+def iter_batches(storage_options, sql, rows=BATCH_ROWS):
+    """Resultado da consulta em DataFrames de até `rows` linhas, nos tipos compactos.
+
+    Usa um cursor próprio (outras consultas não interrompem a leitura); resultado vazio ainda
+    gera um lote vazio, com as colunas.
+    """
+    reader = duckdb_cursor(storage_options).execute(sql).fetch_record_batch(rows)
+    empty = True
+    for batch in reader:
+        empty = False
+        yield arrow_to_pandas(_signed_dictionaries(pa.Table.from_batches([batch])))
+    if empty:
+        yield arrow_to_pandas(_signed_dictionaries(reader.schema.empty_table()))
+
+
+def copy_to_parquet(cursor, sql, path, table_name, layer):
+    """Grava o resultado da consulta direto do DuckDB em s3://`path`, sem passar pelo pandas.
+
+    A consulta expõe a coluna _pos (ordem das linhas no motor pandas), usada só no desempate da
+    ordenação. Segue a política da tabela (common/parquet_policy.py): sort_by, codec, nível e tamanho
+    do row group; o dicionário por coluna fica a critério do DuckDB, que não tem essa opção.
+    Inteiros saem nos tipos compactos de common/dtypes.py. Retorna o número de linhas gravadas.
+    """
+    policy = parquet_policy(table_name, layer)
+    columns = [row[0] for row in cursor.execute(f"DESCRIBE {sql}").fetchall()]
+
+    casts = []
+    if DTYPES_MODE != "legacy":
+        casts = [f"CAST({c} AS {SQL_INTEGER_TYPES[INTEGER_COLUMNS[c]]}) AS {c}" for c in columns if c in INTEGER_COLUMNS]
+    select = "* EXCLUDE (_pos)" + (f" REPLACE ({', '.join(casts)})" if casts else "")
+
+    order = ["_pos"]
+    options = ["FORMAT parquet"]
+    if policy is not None:
+        if policy["sort"]:
+            order = [f"{c} NULLS LAST" for c in policy["sort_by"] if c in columns] + order
+        options += [f"COMPRESSION {policy['compression']}", f"COMPRESSION_LEVEL {policy['compression_level']}",
+                    f"ROW_GROUP_SIZE {policy['row_group_size']}"]
+
+    return cursor.execute(f"""
+        COPY (SELECT {select} FROM ({sql}) ORDER BY {', '.join(order)})
+        TO 's3://{path}' ({', '.join(options)})
+    """).fetchone()[0]
@@ -0,0 +1,61 @@
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import text
+
+# postgres/init/create_gold_dw.sql é a única definição das tabelas do DW: o Postgres o executa ao
+# criar o volume e os jobs reexecutam daqui os CREATE ... IF NOT EXISTS das tabelas que usam (DW
+# antigo, banco de métricas separado). Nos containers do Airflow o diretório é montado em
+# /opt/airflow/postgres/init (docker-compose.yml), ao lado de /opt/airflow/jobs.
+DW_INIT_SQL = Path(os.environ.get("OLIST_DW_INIT_SQL",
+                                  Path(__file__).resolve().parents[2] / "postgres" / "init" / "create_gold_dw.sql"))
+
+TABLE_PATTERN = re.compile(r"CREATE TABLE IF NOT EXISTS (\w+)")
+INDEX_PATTERN = re.compile(r"CREATE INDEX IF NOT EXISTS (\w+) ON (\w+)\s*\(([^)]*)\)")
+
+
+@lru_cache(maxsize=None)
+def dw_statements():
+    """Comandos do script, na ordem do arquivo, sem comentários nem BEGIN/COMMIT."""
+    script = re.sub(r"--[^\n]*", "", DW_INIT_SQL.read_text(encoding="utf-8"))
+    statements = [s.strip() for s in script.split(";")]
+    return [s for s in statements if s and s.upper() not in ("BEGIN", "COMMIT")]
+
+
+def dw_tables():
+    """Tabelas criadas pelo script."""
+    return {match.group(1) for match in map(TABLE_PATTERN.match, dw_statements()) if match}
+
+
+def table_ddl(table_name):
+    """CREATE TABLE IF NOT EXISTS da tabela no script."""
+    for statement in dw_statements():
+        match = TABLE_PATTERN.match(statement)
+        if match and match.group(1) == table_name:
+            return statement
+    raise KeyError(f"{table_name} não está em {DW_INIT_SQL}")
+
+
+def table_indexes(table_name):
+    """{índice: colunas} dos CREATE INDEX da tabela no script."""
+    return {match.group(1): match.group(3).strip()
+            for match in map(INDEX_PATTERN.match, dw_statements())
+            if match and match.group(2) == table_name}
+
+
+def primary_key(table_name):
+    """Colunas da PRIMARY KEY (...) declarada no CREATE TABLE da tabela."""
+    match = re.search(r"PRIMARY KEY \(([^)]*)\)", table_ddl(table_name))
+    return [c.strip() for c in match.group(1).split(",")] if match else []
+
+
+def ensure_tables(conn, *table_names):
+    """Cria, com o DDL do script, as tabelas (e seus índices) que ainda não existem."""
+    for table_name in table_names:
+        conn.execute(text(table_ddl(table_name)))
+        for statement in dw_statements():
+            match = INDEX_PATTERN.match(statement)
+            if match and match.group(2) == table_name:
+                conn.execute(text(statement))
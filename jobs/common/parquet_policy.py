@@ -0,0 +1,131 @@
+import os
+
+# Política de escrita Parquet por camada e tabela. OLIST_PARQUET_POLICY=legacy volta aos padrões
+# do pandas (snappy, dicionário em todas as colunas, sem ordenação, row groups de 1 Mi linhas).
+PARQUET_POLICY_MODE = os.environ.get("OLIST_PARQUET_POLICY", "tuned")
+
+# Bronze é a cópia fiel da origem: comprime e codifica, mas não reordena (a moda por CEP da
+# Silver desempata pela ordem de chegada) e é sempre lida inteira. Silver e Gold são ordenadas
+# pelas chaves mais filtradas, em row groups pequenos o bastante para que as estatísticas de
+# cada um permitam pular os que não interessam (32 mil linhas custam ~4% de tamanho a mais
+# que 128 mil, e já dividem pedidos/itens da escala atual em 4 grupos).
+LAYER_DEFAULTS = {
+    "bronze": {"compression": "zstd", "compression_level": 1, "row_group_size": 256_000, "sort": False},
+    "silver": {"compression": "zstd", "compression_level": 3, "row_group_size": 32_000, "sort": True},
+    "gold": {"compression": "zstd", "compression_level": 3, "row_group_size": 32_000, "sort": True},
+}
+
+# sort_by: chaves de filtro; dictionary: colunas com dicionário no Parquet (baixa cardinalidade ou
+# IDs repetidos). IDs únicos por linha ficam fora: o dicionário só custaria CPU até o fallback.
+# Tabelas ausentes usam só os padrões da camada, com dicionário em todas as colunas.
+TABLE_POLICIES = {
+    "olist_orders": {
+        "sort_by": ["order_purchase_timestamp"],
+        "dictionary": ["order_status"],
+    },
+    "olist_order_items": {
+        "sort_by": ["order_id"],
+        "dictionary": ["product_id", "seller_id", "order_item_id"],
+    },
+    "olist_order_payments": {
+        "sort_by": ["order_id"],
+        "dictionary": ["payment_type", "payment_sequential", "payment_installments"],
+    },
+    "olist_order_reviews": {
+        "sort_by": ["order_id"],
+        "dictionary": ["review_score", "review_comment_title", "review_creation_date", "has_comment"],
+    },
+    "olist_customers": {
+        "sort_by": ["customer_id"],
+        "dictionary": ["customer_zip_code_prefix", "customer_city", "customer_state", "geolocation_zip_code_prefix",
+                       "geolocation_city", "geolocation_state", "geolocation_city_normalized", "city_final",
+                       "location_full", "geolocation_lat", "geolocation_lng"],
+    },
+    "olist_sellers": {
+        "sort_by": ["seller_id"],
+        "dictionary": ["seller_zip_code_prefix", "seller_city", "seller_state", "geolocation_zip_code_prefix",
+                       "geolocation_city", "geolocation_state", "geolocation_city_normalized", "city_final",
+                       "location_full", "geolocation_lat", "geolocation_lng"],
+    },
+    "olist_products": {
+        "sort_by": ["product_id"],
+        "dictionary": ["product_category_name", "product_name_length", "product_photos_qty",
+                       "product_length_cm", "product_height_cm", "product_width_cm"],
+    },
+    "olist_geolocation": {
+        "sort_by": ["geolocation_zip_code_prefix"],
+        "dictionary": ["geolocation_zip_code_prefix", "geolocation_city", "geolocation_state"],
+    },
+    "olist_geolocation_ref": {
+        "sort_by": ["geolocation_zip_code_prefix"],
+        "dictionary": ["geolocation_city", "geolocation_state", "geolocation_city_normalized"],
+    },
+    "olist_route_distance": {
+        "sort_by": ["seller_zip_code_prefix", "customer_zip_code_prefix"],
+        "dictionary": ["seller_zip_code_prefix"],
+    },
+    "fato_vendas": {
+        "sort_by": ["fk_data_venda", "order_id"],
+        "dictionary": ["product_id", "seller_id", "customer_id", "fk_data_venda", "order_status", "order_item_id",
+                       "delivery_days", "delay_diff_days", "is_delayed"],
+    },
+    "fato_pagamentos": {
+        "sort_by": ["order_id"],
+        "dictionary": ["payment_type", "payment_sequential", "payment_installments"],
+    },
+    "fato_reviews": {
+        "sort_by": ["order_id"],
+        "dictionary": ["review_score", "review_comment_title", "review_creation_date", "has_comment"],
+    },
+    "dim_clientes": {
+        "sort_by": ["customer_id"],
+        "dictionary": ["city_final", "customer_state", "regiao", "location_full", "geolocation_lat", "geolocation_lng"],
+    },
+    "dim_produtos": {
+        "sort_by": ["product_id"],
+        "dictionary": ["product_category_name"],
+    },
+    "dim_vendedores": {
+        "sort_by": ["seller_id"],
+        "dictionary": ["city_final", "seller_state", "location_full", "geolocation_lat", "geolocation_lng"],
+    },
+}
+
+
+def parquet_policy(table_name, layer):
+    """Opções efetivas de escrita da tabela na camada (None no modo legacy)."""
+    if PARQUET_POLICY_MODE == "legacy":
+        return None
+    return {"sort_by": [], "dictionary": True, **LAYER_DEFAULTS[layer], **TABLE_POLICIES.get(table_name, {})}
+
+
+def writer_options(policy, columns):
+    """kwargs de pyarrow.parquet (write_table/ParquetWriter) para as colunas presentes."""
+    if policy is None:
+        return {}
+    dictionary = policy["dictionary"]
+    if dictionary is not True:
+        dictionary = [c for c in dictionary if c in columns]
+    return {"compression": policy["compression"], "compression_level": policy["compression_level"],
+            "use_dictionary": dictionary, "write_statistics": True}
+
+
+def apply_sort(df, policy):
+    """Ordena pelas chaves da política (estável, nulos no fim); Bronze mantém a ordem da origem."""
+    if policy is None or not policy["sort"]:
+        return df
+    keys = [c for c in policy["sort_by"] if c in df.columns]
+    if not keys:
+        return df
+    return df.sort_values(keys, kind="stable", na_position="last", ignore_index=True)
+
+
+def write_parquet(df, path, table_name, layer, storage_options=None):
+    """df.to_parquet com a política da tabela: ordenação, codec, dicionário e tamanho do row group."""
+    policy = parquet_policy(table_name, layer)
+    if policy is None:
+        df.to_parquet(path, index=False, storage_options=storage_options)
+        return
+    apply_sort(df, policy).to_parquet(path, index=False, storage_options=storage_options,
+                                      row_group_size=policy["row_group_size"],
+                                      **writer_options(policy, df.columns))
@@ -0,0 +1,96 @@
+import logging
+from io import StringIO
+
+import pandas as pd
+from sqlalchemy import text
+
+# Linhas por bloco enviado via COPY
+COPY_CHUNK_ROWS = 100_000
+# A partir deste volume os índices secundários são removidos e recriados ao redor da carga
+REBUILD_INDEX_MIN_ROWS = 500_000
+
+
+def drop_secondary_indexes(conn, table_name):
+    """Remove os índices que não sustentam constraints (PK/UNIQUE) e retorna seus DDLs."""
+    query = text("""
+        SELECT i.indexname, i.indexdef FROM pg_indexes i
+        WHERE i.tablename = :table_name
+          AND i.indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table_name AS regclass))
+    """)
+    indexes = conn.execute(query, {"table_name": table_name}).fetchall()
+    for index_name, _ in indexes:
+        conn.execute(text(f'DROP INDEX "{index_name}"'))
+    return [index_def for _, index_def in indexes]
+
+
+def column_types(conn, table_name):
+    """{coluna: data_type} da tabela de destino."""
+    columns = conn.execute(
+        text("SELECT column_name, data_type FROM information_schema.columns WHERE table_name = :table_name"),
+        {"table_name": table_name}
+    ).fetchall()
+    return dict(columns)
+
+
+def split_columns(df, target_types):
+    """Par (colunas de `df` presentes no destino, as float dentre elas que vão para colunas inteiras).
+
+    Só compara com target_types, sem consultar o banco: roda a cada lote, já que um lote pode
+    ter float (nulos) numa coluna em que outro tem inteiro.
+    """
+    cols = [c for c in df.columns if c in target_types]
+    int_cols = [c for c in cols if target_types[c] in ('smallint', 'integer', 'bigint') and df[c].dtype.kind == 'f']
+    return cols, int_cols
+
+
+def target_columns(conn, df, table_name, target_types=None):
+    """Mesmo par de split_columns, com os tipos lidos de `table_name` quando target_types não vem.
+
+    Registra no log as colunas do DataFrame ausentes no destino, que ficam fora da carga.
+    """
+    target_types = target_types or column_types(conn, table_name)
+    ignored = [c for c in df.columns if c not in target_types]
+    if ignored:
+        logging.info(f"{table_name}: colunas ignoradas na carga (ausentes no destino): {ignored}")
+    return split_columns(df, target_types)
+
+
+def copy_to_postgres(conn, df, table_name, chunk_rows=COPY_CHUNK_ROWS, rebuild_indexes=None):
+    """Carga em massa via COPY FROM STDIN (CSV) na transação corrente de `conn`.
+
+    Apenas as colunas existentes na tabela de destino são enviadas; colunas float que
+    chegam a colunas inteiras (ex.: delivery_days com nulos) são convertidas para Int64.
+    `df` também pode ser um iterável de DataFrames (lotes de uma tabela que não cabe em memória);
+    sem rebuild_indexes explícito, os índices secundários saem quando o volume enviado chega a
+    REBUILD_INDEX_MIN_ROWS e voltam ao fim da carga.
+    """
+    frames = [df] if isinstance(df, pd.DataFrame) else df
+    target_types = None
+    index_defs = []
+    dropped = rebuild_indexes is False
+    sent = 0
+    cursor = conn.connection.cursor()
+    for frame in frames:
+        if target_types is None:
+            target_types = column_types(conn, table_name)
+            cols, _ = target_columns(conn, frame, table_name, target_types)
+            column_list = ", ".join(f'"{c}"' for c in cols)
+            copy_sql = f"COPY {table_name} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        _, int_cols = split_columns(frame, target_types)
+
+        if not dropped and (rebuild_indexes or sent + len(frame) >= REBUILD_INDEX_MIN_ROWS):
+            index_defs = drop_secondary_indexes(conn, table_name)
+            dropped = True
+
+        for start in range(0, len(frame), chunk_rows):
+            chunk = frame.iloc[start:start + chunk_rows][cols]
+            if int_cols:
+                chunk = chunk.astype({c: 'Int64' for c in int_cols})
+            buffer = StringIO()
+            chunk.to_csv(buffer, index=False, header=False, na_rep='\\N')
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+        sent += len(frame)
+
+    for index_def in index_defs:
+        conn.execute(text(index_def))
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# Tabela Silver com a distância de cada rota (CEP vendedor, CEP cliente) presente nos pedidos
+ROUTE_DISTANCE_TABLE = "olist_route_distance"
+ROUTE_DISTANCE_COLUMNS = ['seller_zip_code_prefix', 'customer_zip_code_prefix', 'distancia_km']
+
+route_distance_stats = {"lookups": 0, "hits": 0}
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    r = 6371
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlambda = np.radians(lon2 - lon1)
+    a = np.sin(dphi/2)**2 + np.cos(phi1)*np.cos(phi2)*np.sin(dlambda/2)**2
+    return 2 * r * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+
+def zip_numbers(values):
+    """CEP (prefixo de 5 dígitos, texto) como float; NaN se nulo ou não numérico.
+
+    Converte só os CEPs distintos (fatorização), não cada linha.
+    """
+    codes, uniques = pd.factorize(pd.Series(values))
+    numbers = pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce').to_numpy(dtype=float)
+    return np.append(numbers, np.nan)[codes]
+
+
+def pair_keys(seller_zip, customer_zip):
+    """Chave int64 da rota: CEP vendedor * 100000 + CEP cliente (-1 se algum CEP for inválido)."""
+    seller = zip_numbers(seller_zip)
+    customer = zip_numbers(customer_zip)
+    valid = ~(np.isnan(seller) | np.isnan(customer))
+    return np.where(valid, seller * 100_000 + customer, -1).astype(np.int64)
+
+
+def build_route_distances(routes):
+    """Distância por par de CEPs distinto a partir de linhas com CEPs e coordenadas de vendedor/cliente.
+
+    As coordenadas vêm da média por CEP (olist_geolocation_ref), então cada par tem uma única
+    distância; pares sem coordenadas ficam de fora (sem distância no consumidor).
+    """
+    pairs = routes.drop_duplicates(['seller_zip_code_prefix', 'customer_zip_code_prefix'])
+    distances = haversine_distance(pairs['geolocation_lat_cust'].to_numpy(dtype=float),
+                                   pairs['geolocation_lng_cust'].to_numpy(dtype=float),
+                                   pairs['geolocation_lat_sell'].to_numpy(dtype=float),
+                                   pairs['geolocation_lng_sell'].to_numpy(dtype=float))
+    df = pairs[['seller_zip_code_prefix', 'customer_zip_code_prefix']].assign(distancia_km=distances)
+    df = df[df['distancia_km'].notna()]
+    return df.sort_values(['seller_zip_code_prefix', 'customer_zip_code_prefix']).reset_index(drop=True)
+
+
+def load_route_distance_index(df):
+    """Índice compacto em memória: chaves int64 ordenadas + distâncias (busca binária)."""
+    keys = pair_keys(df['seller_zip_code_prefix'], df['customer_zip_code_prefix'])
+    order = np.argsort(keys, kind='stable')
+    index = {'keys': keys[order], 'distances': df['distancia_km'].to_numpy(dtype=float)[order]}
+    print(f"Indice de distancias: {len(keys):,} rotas, {route_index_bytes(index) / 1024**2:.1f} MB")
+    return index
+
+
+def route_index_bytes(index):
+    return index['keys'].nbytes + index['distances'].nbytes
+
+
+def lookup_route_distance(index, seller_zip, customer_zip):
+    """Distância de cada linha pelo par de CEPs; NaN para rotas ausentes do índice."""
+    keys = pair_keys(seller_zip, customer_zip)
+    pos = np.searchsorted(index['keys'], keys)
+    pos = np.minimum(pos, max(len(index['keys']) - 1, 0))
+    hit = (keys >= 0) & (index['keys'][pos] == keys) if len(index['keys']) else np.zeros(len(keys), dtype=bool)
+    distances = np.full(len(keys), np.nan)
+    distances[hit] = index['distances'][pos[hit]]
+
+    route_distance_stats['lookups'] += len(keys)
+    route_distance_stats['hits'] += int(hit.sum())
+    return distances
+
+
+def route_distance_report():
+    lookups, hits = route_distance_stats['lookups'], route_distance_stats['hits']
+    rate = hits / lookups if lookups else 0.0
+    print(f"Indice de distancias: {hits:,} hit(s) em {lookups:,} linha(s) ({rate:.1%})")
+    return dict(route_distance_stats)
@@ -0,0 +1,116 @@
+import os
+import time
+import uuid
+import logging
+from pathlib import Path
+
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import s3fs
+
+from common.metrics import record
+from common.dtypes import arrow_to_pandas
+
+# Configurações de Ambiente
+MINIO_ENDPOINT = os.environ.get("OLIST_MINIO_ENDPOINT", "http://minio:9000")
+MINIO_ACCESS_KEY = "admin"
+MINIO_SECRET_KEY = "admin12345"
+SILVER_BUCKET = "silver"
+
+storage_options = {
+    "key": MINIO_ACCESS_KEY,
+    "secret": MINIO_SECRET_KEY,
+    "client_kwargs": {"endpoint_url": MINIO_ENDPOINT},
+    "use_listings_cache": False
+}
+
+# Cache local compartilhado pelas tarefas do worker (gold, ML...) durante a execução da DAG
+CACHE_DIR = Path(os.environ.get("OLIST_SILVER_CACHE_DIR", "/tmp/olist_silver_cache"))
+CACHE_MAX_BYTES = int(os.environ.get("OLIST_SILVER_CACHE_MAX_BYTES", 4 * 1024**3))
+
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def _etag(info):
+    return str(info.get("ETag", "")).strip('"')
+
+
+def _evict(keep):
+    """Remove os arquivos menos usados recentemente até o cache caber em CACHE_MAX_BYTES."""
+    files = sorted(CACHE_DIR.glob("*.arrow"), key=lambda f: f.stat().st_mtime)
+    total = sum(f.stat().st_size for f in files)
+    for f in files:
+        if total <= CACHE_MAX_BYTES:
+            break
+        if f == keep:
+            continue
+        total -= f.stat().st_size
+        f.unlink(missing_ok=True)
+        logging.info(f"Cache Silver: {f.name} removido (LRU)")
+
+
+def cached_path(table_name, bucket=SILVER_BUCKET):
+    """Caminho local (Arrow IPC/Feather sem compressão) da versão atual da tabela.
+
+    A versão é identificada pelo ETag do Parquet no MinIO: se o objeto mudou, baixa de novo;
+    caso contrário só atualiza o mtime, usado como relógio do LRU.
+    """
+    fs = s3fs.S3FileSystem(**storage_options)
+    remote = f"{bucket}/{table_name}/{table_name}.parquet"
+    info = fs.info(remote)
+    etag = _etag(info)
+    local = CACHE_DIR / f"{bucket}__{table_name}__{etag}.arrow"
+
+    if local.exists():
+        cache_stats["hits"] += 1
+        os.utime(local)
+        return local
+
+    cache_stats["misses"] += 1
+    record(bytes_read=info.get("size", 0))
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with fs.open(remote, "rb") as f:
+        table = pq.read_table(f)
+    # Escrita atômica: outra tarefa pode estar lendo/gravando a mesma tabela
+    tmp = local.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, local)
+
+    for old in CACHE_DIR.glob(f"{bucket}__{table_name}__*.arrow"):
+        if old != local:
+            old.unlink(missing_ok=True)
+    _evict(keep=local)
+    return local
+
+
+def read_silver_table(table_name, columns=None, filters=None, bucket=SILVER_BUCKET):
+    """Tabela Arrow a partir do cache local: mapeada em memória (zero-copy) ou, com `filters`
+    (expressão pyarrow.compute, ex.: pc.field('order_status').isin([...])), filtrada no scan
+    do dataset, antes de qualquer conversão para pandas."""
+    path = cached_path(table_name, bucket)
+    if filters is None:
+        return feather.read_table(path, columns=columns, memory_map=True)
+    return ds.dataset(path, format="ipc").to_table(columns=columns, filter=filters)
+
+
+def read_silver(table_name, columns=None, filters=None, bucket=SILVER_BUCKET):
+    """Equivalente a pd.read_parquet(s3://silver/<tabela>/<tabela>.parquet, columns=..., filters=...) com cache local,
+    já nos tipos compactos de common/dtypes.py."""
+    start = time.perf_counter()
+    df = arrow_to_pandas(read_silver_table(table_name, columns, filters, bucket), table_name)
+    record(rows_in=len(df))
+    logging.info(f"Silver {table_name}: {len(df)} linhas em {time.perf_counter() - start:.2f}s")
+    return df
+
+
+def cache_report():
+    total = cache_stats["hits"] + cache_stats["misses"]
+    print(f"Cache Silver local: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es) em {total} leitura(s)")
+    return dict(cache_stats)
+
+
+def iter_silver_batches(table_name, columns=None, filters=None, batch_size=100_000, bucket=SILVER_BUCKET):
+    """Lotes Arrow (RecordBatch) de até `batch_size` linhas, lidos do cache local sob demanda."""
+    dataset = ds.dataset(cached_path(table_name, bucket), format="ipc")
+    yield from dataset.to_batches(columns=columns, filter=filters, batch_size=batch_size)
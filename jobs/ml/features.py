@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from common.route_distance import haversine_distance
+
+# Risco padrão para rotas/categorias sem histórico no treino
+DEFAULT_RISK = 0.07
+# Handling time assumido quando negativo ou indisponível (horas)
+DEFAULT_HANDLING_TIME_H = 24
+
+
+def build_risk_lookups(route_risk, category_risk):
+    """Converte route_risk.json/category_risk.json em tabelas indexadas por código.
+
+    Rotas viram uma matriz [UF vendedor, UF cliente] e categorias um vetor. A última
+    linha/coluna/posição guarda DEFAULT_RISK, de modo que o código -1 devolvido por
+    lookup_codes para valores desconhecidos ou nulos cai direto no padrão.
+    """
+    pairs = [key.split("_", 1) for key in route_risk]
+    states = pd.Index(sorted({state for pair in pairs for state in pair}))
+    route_table = np.full((len(states) + 1, len(states) + 1), DEFAULT_RISK)
+    seller_codes = states.get_indexer([seller for seller, _ in pairs])
+    customer_codes = states.get_indexer([customer for _, customer in pairs])
+    route_table[seller_codes, customer_codes] = list(route_risk.values())
+
+    categories = pd.Index(list(category_risk))
+    category_table = np.append(np.array(list(category_risk.values()), dtype=float), DEFAULT_RISK)
+    return {"states": states, "route": route_table, "categories": categories, "category": category_table}
+
+
+def lookup_codes(index, values):
+    """Posição de cada valor em `index` (-1 se ausente ou nulo).
+
+    Fatoriza os valores antes (códigos categóricos) para consultar o índice só com os
+    valores distintos: UFs e categorias têm poucas dezenas de valores por milhão de itens.
+    """
+    codes, uniques = pd.factorize(values)
+    return np.append(index.get_indexer(uniques), -1)[codes]
+
+
+def compute_features(df, lookups, reference_time):
+    """Features do modelo de atraso, por item, como arrays NumPy (nome -> array).
+
+    `df` é o merge pedido/item/produto/cliente/vendedor com datas já tipadas pela Silver;
+    `reference_time` é o "agora" usado no handling time de pedidos ainda não despachados.
+    """
+    approved = df['order_approved_at']
+    carrier = df['order_delivered_carrier_date']
+
+    handling = ((carrier.fillna(reference_time) - approved).dt.total_seconds() / 3600).to_numpy(dtype=float)
+    # Negativo ou nulo (ex.: pedido sem aprovação) -> padrão; NaN >= 0 é False
+    handling = np.where(handling >= 0, handling, DEFAULT_HANDLING_TIME_H)
+
+    states = lookups['states']
+    risk_route = lookups['route'][lookup_codes(states, df['seller_state']), lookup_codes(states, df['customer_state'])]
+    risk_category = lookups['category'][lookup_codes(lookups['categories'], df['product_category_name'])]
+
+    weight = df['product_weight_g'].to_numpy(dtype=float)
+    volume = df['volume_cm3'].to_numpy(dtype=float)
+    return {
+        'price': df['price'].to_numpy(dtype=float),
+        'freight_value': df['freight_value'].to_numpy(dtype=float),
+        'product_weight_g': weight,
+        'volume_cm3': volume,
+        'distancia_km': haversine_distance(df['geolocation_lat_cust'].to_numpy(dtype=float),
+                                           df['geolocation_lng_cust'].to_numpy(dtype=float),
+                                           df['geolocation_lat_sell'].to_numpy(dtype=float),
+                                           df['geolocation_lng_sell'].to_numpy(dtype=float)),
+        'densidade_prod': weight / (volume + 1),
+        'dia_semana_compra': df['order_purchase_timestamp'].dt.dayofweek.to_numpy(dtype=float),
+        'risk_route': risk_route,
+        'risk_category': risk_category,
+        'handling_time_h': handling,
+    }
+
+
+def build_feature_matrix(df, lookups, features, reference_time):
+    """Matriz (n_itens x n_features) na ordem de `features` (config['features']), nulos = 0."""
+    computed = compute_features(df, lookups, reference_time)
+    X = np.column_stack([computed[name] for name in features])
+    X[np.isnan(X)] = 0
+    return X
@@ -0,0 +1,196 @@
+"""Serviço local de pontuação de atraso: artefatos e tabelas de apoio carregados uma única vez.
+
+Uso:
+    python jobs/ml/serve_model.py --port 8765
+
+POST /score com um pedido ou {"orders": [...]} (micro-lote):
+    {"order_id": "...", "customer_id": "...", "order_purchase_timestamp": "2018-08-01 10:00:00",
+     "order_approved_at": "...", "order_delivered_carrier_date": null,
+     "items": [{"product_id": "...", "seller_id": "...", "price": 59.9, "freight_value": 12.3}]}
+GET /health devolve a versão dos artefatos em uso.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.silver_cache import read_silver, read_silver_table
+from features import build_feature_matrix
+from predict_delay import (MODEL_DIR, PRODUCT_COLUMNS, CUSTOMER_COLUMNS, SELLER_COLUMNS,
+                           load_artifacts)
+
+ARTIFACT_FILES = ["logistic_model_v1.pkl", "route_risk.json", "category_risk.json", "model_config.json"]
+# Intervalo mínimo entre verificações de mtime dos artefatos (hot reload)
+RELOAD_CHECK_S = 2.0
+# Intervalo para recarregar produtos/clientes/vendedores da Silver (0 = nunca)
+REFERENCE_REFRESH_S = 3600
+
+ORDER_FIELDS = ['order_purchase_timestamp', 'order_approved_at', 'order_delivered_carrier_date']
+
+
+def load_reference_tables():
+    """Produtos, clientes e vendedores indexados pela chave, já com os sufixos usados nas features."""
+    products = read_silver("olist_products", columns=PRODUCT_COLUMNS).drop_duplicates('product_id')
+    customers = read_silver("olist_customers", columns=CUSTOMER_COLUMNS).drop_duplicates('customer_id')
+    sellers = read_silver("olist_sellers", columns=SELLER_COLUMNS).drop_duplicates('seller_id')
+    purchase_ts = read_silver_table("olist_orders", columns=['order_purchase_timestamp'])['order_purchase_timestamp']
+    return {
+        'products': products.set_index('product_id'),
+        'customers': customers.set_index('customer_id').add_suffix('_cust')
+                              .rename(columns={'customer_state_cust': 'customer_state'}),
+        'sellers': sellers.set_index('seller_id').add_suffix('_sell')
+                          .rename(columns={'seller_state_sell': 'seller_state'}),
+        # Mesma data de referência da inferência em lote (compra mais recente + 1 dia)
+        'reference_time': pd.Timestamp(pc.max(purchase_ts).as_py()) + pd.Timedelta(days=1),
+    }
+
+
+class ScoringService:
+    """Artefatos + tabelas de apoio em memória, trocados atomicamente quando os arquivos mudam."""
+
+    def __init__(self, model_dir=MODEL_DIR, reference_loader=load_reference_tables):
+        self.model_dir = Path(model_dir)
+        self.reference_loader = reference_loader
+        self.lock = threading.Lock()
+        self.signature = self._artifact_signature()
+        self.artifacts = load_artifacts(self.model_dir)
+        self.reference = reference_loader()
+        self.loaded_at = time.time()
+        self.reference_loaded_at = self.loaded_at
+        self.last_check = self.loaded_at
+
+    def _artifact_signature(self):
+        return tuple((name, (self.model_dir / name).stat().st_mtime_ns) for name in ARTIFACT_FILES)
+
+    def maybe_reload(self):
+        """Recarrega os artefatos se algum arquivo mudou (checagem limitada a RELOAD_CHECK_S)."""
+        now = time.time()
+        if now - self.last_check < RELOAD_CHECK_S:
+            return
+        with self.lock:
+            if now - self.last_check < RELOAD_CHECK_S:
+                return
+            self.last_check = now
+            try:
+                signature = self._artifact_signature()
+                if signature != self.signature:
+                    self.artifacts = load_artifacts(self.model_dir)
+                    self.signature = signature
+                    self.loaded_at = now
+                    print(f"Artefatos recarregados de {self.model_dir}")
+                if REFERENCE_REFRESH_S and now - self.reference_loaded_at >= REFERENCE_REFRESH_S:
+                    self.reference = self.reference_loader()
+                    self.reference_loaded_at = now
+                    print("Tabelas de apoio recarregadas da Silver")
+            except Exception as e:
+                # Mantém a versão anterior em uso (ex.: arquivo ainda sendo gravado)
+                print(f"Erro ao recarregar artefatos: {e}")
+
+    def score(self, orders):
+        """Probabilidade máxima de atraso e alerta por pedido; pedidos sem itens conhecidos voltam com null."""
+        self.maybe_reload()
+        artifacts, reference = self.artifacts, self.reference
+
+        rows = [
+            {'order_id': o['order_id'], 'customer_id': o.get('customer_id'),
+             **{f: o.get(f) for f in ORDER_FIELDS}, **item}
+            for o in orders for item in o.get('items', [])
+        ]
+        results = {o['order_id']: None for o in orders}
+        if rows:
+            df = pd.DataFrame(rows)
+            for f in ORDER_FIELDS:
+                df[f] = pd.to_datetime(df[f])
+            # Lookups por índice no lugar dos merges da inferência em lote (mesma semântica de inner join)
+            parts = [reference['products'].reindex(df['product_id']),
+                     reference['customers'].reindex(df['customer_id']),
+                     reference['sellers'].reindex(df['seller_id'])]
+            found = np.logical_and.reduce([p.index.isin(t.index) for p, t in
+                                           zip(parts, (reference['products'], reference['customers'], reference['sellers']))])
+            df = pd.concat([df] + [p.reset_index(drop=True) for p in parts], axis=1)[found]
+
+            if not df.empty:
+                features = artifacts['features']
+                X = build_feature_matrix(df, artifacts['lookups'], features, reference['reference_time'])
+                proba = artifacts['model'].predict_proba(pd.DataFrame(X, columns=features))[:, 1]
+                results.update(pd.Series(proba).groupby(df['order_id'].to_numpy()).max().to_dict())
+
+        threshold = artifacts['threshold']
+        return [
+            {'order_id': order_id,
+             'probabilidade_atraso': None if p is None else float(p),
+             'alerta_atraso': None if p is None else int(p >= threshold)}
+            for order_id, p in results.items()
+        ]
+
+    def health(self):
+        return {'status': 'ok', 'artifacts_loaded_at': self.loaded_at,
+                'reference_loaded_at': self.reference_loaded_at,
+                'reference_time': str(self.reference['reference_time'])}
+
+
+def make_handler(service):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        # Keep-alive: clientes reaproveitam a conexão entre requisições
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, service.health())
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send_json(404, {'error': 'not found'})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                orders = payload['orders'] if 'orders' in payload else [payload]
+                self._send_json(200, {'predictions': service.score(orders)})
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {'error': f"payload inválido: {e}"})
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            # Sem log por requisição (latência); erros seguem no print do serviço
+            pass
+
+    return ScoringHandler
+
+
+def serve(host="127.0.0.1", port=8765):
+    service = ScoringService()
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Serviço de pontuação em http://{host}:{port} (POST /score, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço local de pontuação de atraso")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -0,0 +1,82 @@
+from common.duckdb_engine import parquet_scan
+from common.route_distance import ROUTE_DISTANCE_TABLE
+
+# Versões SQL (motor duckdb) das dimensões e fatos de transform_gold.py, lidas direto dos Parquet
+# da Silver. Cada função devolve a consulta com as colunas do pandas mais _pos (ordem das linhas
+# no pandas), para publish_query gravar a Gold e carregar o DW sem montar o DataFrame inteiro:
+# drop_duplicates mantém a primeira linha do arquivo (file_row_number) e o left merge segue a
+# ordem dos itens.
+
+CUSTOMER_COLUMNS = ['customer_id', 'customer_unique_id', 'city_final', 'customer_state', 'regiao',
+                    'location_full', 'geolocation_lat', 'geolocation_lng']
+PRODUCT_COLUMNS = ['product_id', 'product_category_name', 'product_weight_g', 'volume_cm3']
+SELLER_COLUMNS = ['seller_id', 'city_final', 'seller_state', 'location_full', 'geolocation_lat', 'geolocation_lng']
+
+
+def silver_scan(bucket, table_name):
+    return parquet_scan([f"{bucket}/{table_name}/{table_name}.parquet"])
+
+
+def first_by_key(scan, columns, keys):
+    """df[columns].drop_duplicates(subset=keys) na ordem do arquivo (columns=None: todas as colunas)."""
+    select = ', '.join(columns) if columns else '* EXCLUDE (filename, file_row_number)'
+    return f"""
+        SELECT {select}, file_row_number AS _pos FROM (
+            SELECT * FROM {scan}
+            QUALIFY row_number() OVER (PARTITION BY {', '.join(keys)} ORDER BY file_row_number) = 1
+        )
+    """
+
+
+def region_case(column, regions):
+    """get_region em SQL: CASE por UF, 'Outros' para UFs desconhecidas ou nulas."""
+    whens = " ".join(f"WHEN {column} IN ({', '.join(repr(s) for s in states)}) THEN '{region}'"
+                     for region, states in regions.items())
+    return f"CASE {whens} ELSE 'Outros' END"
+
+
+def dim_clientes(bucket, regions):
+    scan = f"(SELECT *, {region_case('customer_state', regions)} AS regiao FROM {silver_scan(bucket, 'olist_customers')})"
+    return first_by_key(scan, CUSTOMER_COLUMNS, ['customer_id'])
+
+
+def dim_produtos(bucket):
+    return first_by_key(silver_scan(bucket, 'olist_products'), PRODUCT_COLUMNS, ['product_id'])
+
+
+def dim_vendedores(bucket):
+    return first_by_key(silver_scan(bucket, 'olist_sellers'), SELLER_COLUMNS, ['seller_id'])
+
+
+def fato_vendas(bucket):
+    """Itens left join pedidos, com horario_venda, a FK YYYYMMDD de dim_calendario e a distância
+    da rota pelo índice da Silver (olist_route_distance)."""
+    customers = first_by_key(silver_scan(bucket, 'olist_customers'), ['customer_id', 'customer_zip_code_prefix'],
+                             ['customer_id'])
+    sellers = first_by_key(silver_scan(bucket, 'olist_sellers'), ['seller_id', 'seller_zip_code_prefix'], ['seller_id'])
+    return f"""
+        SELECT i.order_id, i.order_item_id, i.product_id, i.seller_id, o.customer_id,
+               o.order_purchase_timestamp AS horario_venda,
+               CAST(strftime(o.order_purchase_timestamp, '%Y%m%d') AS INTEGER) AS fk_data_venda,
+               o.order_status, i.price, i.freight_value, i.total_value,
+               o.delivery_days, o.delay_diff_days, o.is_delayed, r.distancia_km,
+               [i.file_row_number, o.file_row_number] AS _pos
+        FROM {silver_scan(bucket, 'olist_order_items')} i
+        LEFT JOIN {silver_scan(bucket, 'olist_orders')} o ON o.order_id = i.order_id
+        LEFT JOIN ({customers}) c ON c.customer_id = o.customer_id
+        LEFT JOIN ({sellers}) s ON s.seller_id = i.seller_id
+        LEFT JOIN read_parquet('s3://{bucket}/{ROUTE_DISTANCE_TABLE}/{ROUTE_DISTANCE_TABLE}.parquet') r
+               ON r.seller_zip_code_prefix = s.seller_zip_code_prefix
+              AND r.customer_zip_code_prefix = c.customer_zip_code_prefix
+    """
+
+
+def fato_pagamentos(bucket):
+    return f"""
+        SELECT * EXCLUDE (filename, file_row_number), file_row_number AS _pos
+        FROM {silver_scan(bucket, 'olist_order_payments')}
+    """
+
+
+def fato_reviews(bucket):
+    return first_by_key(silver_scan(bucket, 'olist_order_reviews'), None, ['review_id', 'order_id'])
@@ -0,0 +1,168 @@
+import time
+import pandas as pd
+from sqlalchemy import text
+
+from common.pg_copy import copy_to_postgres
+from common.dtypes import row_hashes
+from common.dw_schema import ensure_tables, primary_key, table_indexes
+from gold_rollups import mark_rollup_dirty
+
+# Hash e contagem por partição carregada: só meses com conteúdo diferente são reconstruídos
+PARTITION_HASH_TABLE = "gold_partition_hashes"
+
+# Tabelas particionadas por mês (RANGE em `key`, id_data YYYYMMDD). DDL, PK e índices vêm de
+# postgres/init/create_gold_dw.sql (common/dw_schema.py); em tabela particionada a PK precisa
+# conter a chave de partição. Os índices são recriados em cada partição antes do ATTACH, para
+# que ele apenas associe os índices já prontos aos índices da tabela-mãe.
+PARTITIONED_TABLES = {
+    "fato_vendas": {"key": "fk_data_venda"},
+}
+
+
+def month_bounds(month):
+    """Intervalo [início, fim) em id_data para o mês YYYYMM."""
+    year, mon = divmod(month, 100)
+    following = (year + 1) * 100 + 1 if mon == 12 else month + 1
+    return month * 100 + 1, following * 100 + 1
+
+
+def partition_name(table_name, month):
+    return f"{table_name}_{month}"
+
+
+def ensure_partitioned_parent(conn, table_name):
+    """Cria a tabela-mãe particionada; uma versão antiga sem partições é descartada (recarga completa)."""
+    ensure_tables(conn, PARTITION_HASH_TABLE)
+    relkind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table_name}).scalar()
+    if relkind == 'p':
+        return
+    if relkind is not None:
+        print(f"{table_name}: convertendo tabela comum em particionada por mês (recarga completa)")
+        conn.execute(text(f"DROP TABLE {table_name}"))
+    ensure_tables(conn, table_name)
+    conn.execute(text(f"DELETE FROM {PARTITION_HASH_TABLE} WHERE table_name = :t"), {"t": table_name})
+
+
+def month_hashes(df, key):
+    """Hash (soma dos hashes de linha, independente da ordem) e contagem por mês."""
+    row_hash = row_hashes(df)
+    months = (df[key].to_numpy() // 100).astype('int64')
+    grouped = pd.DataFrame({'month': months, 'row_hash': row_hash}).groupby('month')['row_hash']
+    return pd.DataFrame({'row_hash': grouped.sum(), 'row_count': grouped.size()})
+
+
+def staging_name(table_name, month):
+    return f"{partition_name(table_name, month)}_novo"
+
+
+def create_staging(conn, table_name, month):
+    """Tabela nova (vazia) do mês, com a estrutura da tabela-mãe, para receber a carga."""
+    staging = staging_name(table_name, month)
+    conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+    conn.execute(text(f"CREATE TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS)"))
+    return staging
+
+
+def swap_partition(conn, table_name, month):
+    """Troca a partição atual do mês pela tabela nova já carregada (DETACH/DROP/ATTACH).
+
+    A tabela nova recebe CHECK do intervalo, PK e índices antes da troca, então o ATTACH não
+    varre os dados nem constrói índices; os bloqueios na tabela-mãe duram só a troca, no fim
+    da transação.
+    """
+    spec = PARTITIONED_TABLES[table_name]
+    key = spec["key"]
+    start, end = month_bounds(month)
+    name = partition_name(table_name, month)
+    staging = staging_name(table_name, month)
+
+    conn.execute(text(f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_intervalo "
+                      f"CHECK ({key} >= {start} AND {key} < {end})"))
+    conn.execute(text(f"ALTER TABLE {staging} ADD PRIMARY KEY ({', '.join(primary_key(table_name))})"))
+    for columns in table_indexes(table_name).values():
+        conn.execute(text(f"CREATE INDEX ON {staging} ({columns})"))
+
+    drop_partition(conn, table_name, month)
+    conn.execute(text(f"ALTER TABLE {staging} RENAME TO {name}"))
+    conn.execute(text(f"ALTER TABLE {table_name} ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})"))
+    conn.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {staging}_intervalo"))
+
+
+def drop_partition(conn, table_name, month):
+    name = partition_name(table_name, month)
+    attached = conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(:p) AND inhparent = to_regclass(:t))"
+    ), {"p": name, "t": table_name}).scalar()
+    if attached:
+        conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+
+def mark_month_dirty(conn, month):
+    start, end = month_bounds(month)
+    mark_rollup_dirty(conn, "fato_vendas",
+                      f"SELECT id_data AS fk_data_venda FROM dim_calendario WHERE id_data >= {start} AND id_data < {end}")
+
+
+def save_partitioned(engine, batches, table_name, force=False):
+    """Carga por partição mensal: só os meses novos, alterados ou removidos são tocados.
+
+    `batches` devolve, a cada chamada, um iterável novo com os lotes (DataFrames) da tabela: a 1ª
+    passada calcula os hashes por mês e a 2ª distribui as linhas dos meses alterados em tabelas
+    novas, sem juntar a tabela inteira em memória. Cada mês é então trocado na sua própria
+    transação (o resto do histórico não é reescrito nem bloqueado); force=True reconstrói todos
+    os meses (modo full).
+    """
+    spec = PARTITIONED_TABLES[table_name]
+    key = spec["key"]
+    start_time = time.perf_counter()
+    with engine.begin() as conn:
+        ensure_partitioned_parent(conn, table_name)
+        stored = pd.read_sql(text(f"SELECT partition_name, row_hash, row_count FROM {PARTITION_HASH_TABLE} "
+                                  f"WHERE table_name = :t"), conn, params={"t": table_name})
+        # Contagem real por partição: detecta TRUNCATE/alterações feitas fora da carga
+        actual = dict(conn.execute(text(f"SELECT tableoid::regclass::text, COUNT(*) FROM {table_name} GROUP BY 1")).fetchall())
+
+    # Soma por mês dos hashes de cada lote: o total não depende de como as linhas foram divididas
+    current = pd.concat([month_hashes(df, key) for df in batches()]).groupby(level=0).sum()
+    stored = stored.set_index('partition_name')
+    changed, removed = [], []
+    for month, row in current.iterrows():
+        name = partition_name(table_name, month)
+        unchanged = (name in stored.index and stored.at[name, 'row_hash'] == row['row_hash']
+                     and stored.at[name, 'row_count'] == row['row_count'] == actual.get(name, 0))
+        if force or not unchanged:
+            changed.append(month)
+    for name in stored.index:
+        month = int(name.rsplit('_', 1)[1])
+        if month not in current.index:
+            removed.append(month)
+
+    if changed:
+        with engine.begin() as conn:
+            staging = {month: create_staging(conn, table_name, month) for month in changed}
+            for df in batches():
+                months = df[key].to_numpy() // 100
+                for month in set(months.tolist()) & staging.keys():
+                    copy_to_postgres(conn, df[months == month], staging[month], rebuild_indexes=False)
+
+    for month in changed:
+        with engine.begin() as conn:
+            swap_partition(conn, table_name, month)
+            mark_month_dirty(conn, month)
+            conn.execute(text(f"""
+                INSERT INTO {PARTITION_HASH_TABLE} (table_name, partition_name, row_hash, row_count)
+                VALUES (:t, :p, :h, :n)
+                ON CONFLICT (table_name, partition_name) DO UPDATE SET row_hash = EXCLUDED.row_hash, row_count = EXCLUDED.row_count
+            """), {"t": table_name, "p": partition_name(table_name, month),
+                   "h": int(current.at[month, 'row_hash']), "n": int(current.at[month, 'row_count'])})
+    for month in removed:
+        with engine.begin() as conn:
+            drop_partition(conn, table_name, month)
+            mark_month_dirty(conn, month)
+            conn.execute(text(f"DELETE FROM {PARTITION_HASH_TABLE} WHERE table_name = :t AND partition_name = :p"),
+                         {"t": table_name, "p": partition_name(table_name, month)})
+
+    print(f"{table_name}: {len(changed)} de {len(current)} partições mensais reconstruídas, "
+          f"{len(removed)} removidas em {time.perf_counter() - start_time:.1f}s")
+    return changed, removed
@@ -0,0 +1,122 @@
+import time
+from sqlalchemy import text
+
+from common.dw_schema import ensure_tables
+
+# Datas (dim_calendario.id_data) cujos agregados precisam ser recalculados. Preenchida pela carga
+# merge na mesma transação que altera a tabela de origem, então sobrevive a falhas do refresh.
+ROLLUP_PENDING_TABLE = "gold_rollup_pendentes"
+
+# Tabelas de agregados (DDL e índices cobrindo as consultas em postgres/init/create_gold_dw.sql)
+ROLLUP_TABLES = ["agg_vendas_diario", "agg_vendedor_mensal"]
+
+# Como cada tabela de origem (carga merge) afeta as datas dos agregados. `{rel}` é uma relação
+# com as colunas da tabela de origem (delta em staging, versões antigas ou linhas removidas).
+ROLLUP_SOURCES = {
+    "fato_vendas": "SELECT r.fk_data_venda FROM {rel} AS r",
+    "fato_reviews": "SELECT v.fk_data_venda FROM fato_vendas v JOIN {rel} AS r ON r.order_id = v.order_id",
+    "dim_clientes": "SELECT v.fk_data_venda FROM fato_vendas v JOIN {rel} AS r ON r.customer_id = v.customer_id",
+    "dim_produtos": "SELECT v.fk_data_venda FROM fato_vendas v JOIN {rel} AS r ON r.product_id = v.product_id",
+    "dim_vendedores": "SELECT v.fk_data_venda FROM fato_vendas v JOIN {rel} AS r ON r.seller_id = v.seller_id",
+}
+
+# Nota média do pedido atribuída a cada um de seus itens (reviews são por pedido)
+ORDER_REVIEWS = """
+    SELECT order_id, AVG(review_score) AS nota FROM fato_reviews
+    WHERE review_score IS NOT NULL GROUP BY order_id
+"""
+
+DAILY_COLUMNS = """id_data, customer_state, regiao, product_category_name, qtd_pedidos, qtd_itens, receita,
+    valor_frete, qtd_entregues, soma_dias_entrega, qtd_atrasados, qtd_avaliacoes, soma_notas"""
+DAILY_SELECT = f"""
+    SELECT v.fk_data_venda,
+           COALESCE(c.customer_state, '--'),
+           COALESCE(c.regiao, 'Outros'),
+           COALESCE(p.product_category_name, 'outros'),
+           COUNT(DISTINCT v.order_id), COUNT(*), SUM(v.total_value), SUM(v.freight_value),
+           COUNT(v.delivery_days), SUM(v.delivery_days), COALESCE(SUM(v.is_delayed), 0),
+           COUNT(r.nota), SUM(r.nota)
+    FROM fato_vendas v
+    LEFT JOIN dim_clientes c ON c.customer_id = v.customer_id
+    LEFT JOIN dim_produtos p ON p.product_id = v.product_id
+    LEFT JOIN ({ORDER_REVIEWS}) r ON r.order_id = v.order_id
+    {{where}}
+    GROUP BY 1, 2, 3, 4
+"""
+
+MONTHLY_COLUMNS = """seller_id, id_mes, seller_state, qtd_pedidos, qtd_itens, receita, qtd_entregues,
+    qtd_atrasados, qtd_avaliacoes, soma_notas"""
+MONTHLY_SELECT = f"""
+    SELECT v.seller_id, v.fk_data_venda / 100 * 100 + 1, MAX(s.seller_state),
+           COUNT(DISTINCT v.order_id), COUNT(*), SUM(v.total_value),
+           COUNT(v.delivery_days), COALESCE(SUM(v.is_delayed), 0),
+           COUNT(r.nota), SUM(r.nota)
+    FROM fato_vendas v
+    LEFT JOIN dim_vendedores s ON s.seller_id = v.seller_id
+    LEFT JOIN ({ORDER_REVIEWS}) r ON r.order_id = v.order_id
+    {{where}}
+    GROUP BY 1, 2
+"""
+
+# Datas/meses pendentes como filtros sobre fato_vendas (semi-join no idx_vendas_data)
+PENDING_DAYS = f"WHERE v.fk_data_venda IN (SELECT id_data FROM {ROLLUP_PENDING_TABLE})"
+PENDING_MONTHS = f"""WHERE v.fk_data_venda IN (
+        SELECT c.id_data FROM dim_calendario c
+        WHERE c.id_data / 100 IN (SELECT id_data / 100 FROM {ROLLUP_PENDING_TABLE}))"""
+
+
+def ensure_rollup_tables(conn):
+    ensure_tables(conn, ROLLUP_PENDING_TABLE, *ROLLUP_TABLES)
+
+
+def mark_rollup_dirty(conn, table_name, relation_sql, params=None):
+    """Registra como pendentes as datas de venda afetadas pelas linhas de `relation_sql`."""
+    if table_name not in ROLLUP_SOURCES:
+        return
+    # Primeira carga de dimensões antes de existir fato_vendas: nada a agregar ainda
+    if conn.execute(text("SELECT to_regclass('fato_vendas') IS NULL")).scalar():
+        return
+    ensure_rollup_tables(conn)
+    source = ROLLUP_SOURCES[table_name].format(rel=f"({relation_sql})")
+    conn.execute(text(
+        f"INSERT INTO {ROLLUP_PENDING_TABLE} (id_data) SELECT DISTINCT d.fk_data_venda FROM ({source}) AS d(fk_data_venda) "
+        f"WHERE d.fk_data_venda IS NOT NULL ON CONFLICT DO NOTHING"
+    ), params or {})
+
+
+def refresh_rollups(engine, full=False):
+    """Atualiza agg_vendas_diario e agg_vendedor_mensal.
+
+    full=True recalcula tudo (após carga full); caso contrário apenas os dias e meses
+    registrados em ROLLUP_PENDING_TABLE são apagados e recalculados. Uma única transação:
+    os dashboards nunca veem um agregado parcial.
+    """
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        ensure_rollup_tables(conn)
+        # Agregados recém-criados (ou esvaziados por TRUNCATE CASCADE) sobre fatos já carregados
+        if not full and conn.execute(text(
+                "SELECT NOT EXISTS (SELECT 1 FROM agg_vendas_diario) AND EXISTS (SELECT 1 FROM fato_vendas)")).scalar():
+            full = True
+        if full:
+            pending = None
+            conn.execute(text("DELETE FROM agg_vendas_diario"))
+            conn.execute(text("DELETE FROM agg_vendedor_mensal"))
+            daily_where, monthly_where = "", ""
+        else:
+            pending = conn.execute(text(f"SELECT COUNT(*) FROM {ROLLUP_PENDING_TABLE}")).scalar()
+            if not pending:
+                print("Agregados Gold: nenhuma data pendente")
+                return
+            conn.execute(text(f"DELETE FROM agg_vendas_diario WHERE id_data IN (SELECT id_data FROM {ROLLUP_PENDING_TABLE})"))
+            conn.execute(text(f"DELETE FROM agg_vendedor_mensal WHERE id_mes / 100 IN "
+                              f"(SELECT id_data / 100 FROM {ROLLUP_PENDING_TABLE})"))
+            daily_where, monthly_where = PENDING_DAYS, PENDING_MONTHS
+
+        daily = conn.execute(text(f"INSERT INTO agg_vendas_diario ({DAILY_COLUMNS}) {DAILY_SELECT.format(where=daily_where)}")).rowcount
+        monthly = conn.execute(text(f"INSERT INTO agg_vendedor_mensal ({MONTHLY_COLUMNS}) {MONTHLY_SELECT.format(where=monthly_where)}")).rowcount
+        conn.execute(text(f"DELETE FROM {ROLLUP_PENDING_TABLE}"))
+
+    scope = "completo" if full else f"{pending} dia(s) pendente(s)"
+    print(f"Agregados Gold ({scope}): {daily} linhas diárias e {monthly} vendedor/mês "
+          f"em {time.perf_counter() - start:.1f}s")
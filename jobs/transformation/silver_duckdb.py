@@ -0,0 +1,204 @@
+from common.duckdb_engine import parquet_scan, file_order, fetch_df
+
+# Versões SQL (motor duckdb) das etapas da Silver. Cada função devolve a consulta com as mesmas
+# colunas que a versão pandas de transform_silver.py grava, mais a coluna _pos (ordem das linhas
+# no pandas), para copy_to_parquet gravar direto no lake. A ordem de read_bronze vira _pos e
+# desempata modas e deduplicações como no pandas. Normalização de texto (normalize_series) e
+# str.title continuam no pandas, aplicadas só aos valores distintos e registradas como tabelas.
+
+DATE_COLUMNS = ['order_purchase_timestamp', 'order_approved_at', 'order_delivered_carrier_date',
+                'order_delivered_customer_date', 'order_estimated_delivery_date']
+PRODUCT_DIM_COLUMNS = ['product_weight_g', 'product_length_cm', 'product_height_cm', 'product_width_cm']
+
+
+def zfill(expr, width=5):
+    """.astype(str).str.zfill(width) em SQL."""
+    text = f"CAST({expr} AS VARCHAR)"
+    return f"CASE WHEN length({text}) < {width} THEN lpad({text}, {width}, '0') ELSE {text} END"
+
+
+def days_between(start, end):
+    """(end - start).dt.days: dias inteiros arredondados para baixo, NULL se alguma data for nula."""
+    return f"floor((epoch_ns({end}) - epoch_ns({start})) / 86400e9)"
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """route_distance.haversine_distance em SQL (km)."""
+    a = (f"pow(sin(radians({lat2} - {lat1}) / 2), 2) + "
+         f"cos(radians({lat1})) * cos(radians({lat2})) * pow(sin(radians({lon2} - {lon1}) / 2), 2)")
+    return f"2 * 6371 * atan2(sqrt({a}), sqrt(1 - ({a})))"
+
+
+def bronze_sql(paths, keys=None):
+    """Equivalente SQL de read_bronze: snapshot + partições incrementais, mais recente por chave.
+
+    _pos reproduz a ordem do pandas (concat na ordem dos arquivos e sort estável por
+    ingestion_date); sem partições não há reordenação nem deduplicação, como em read_bronze.
+    """
+    scan = parquet_scan(paths)
+    if len(paths) == 1:
+        return f"(SELECT * EXCLUDE (filename, file_row_number), file_row_number AS _pos FROM {scan})"
+    ordered = f"""
+        SELECT * EXCLUDE (filename, file_row_number),
+               row_number() OVER (ORDER BY ingestion_date NULLS LAST, {file_order(paths)}, file_row_number) AS _pos
+        FROM {scan}
+    """
+    if not keys:
+        return f"({ordered})"
+    return f"(SELECT * FROM ({ordered}) QUALIFY row_number() OVER (PARTITION BY {', '.join(keys)} ORDER BY _pos DESC) = 1)"
+
+
+def register_mapping(cursor, name, values, fn, source='value', target='mapped'):
+    """Registra a tabela `name` (source -> target) com `fn` aplicada a cada valor distinto."""
+    df = values.rename(source).drop_duplicates().dropna().to_frame()
+    df[target] = fn(df[source]) if len(df) else df[source]
+    cursor.register(name, df.reset_index(drop=True))
+
+
+def most_frequent_sql(rel, key, col):
+    """most_frequent_by_group em SQL: maior contagem, empate pela primeira ocorrência (_pos)."""
+    return f"""
+        SELECT {key}, {col} FROM (
+            SELECT {key}, {col}, COUNT(*) AS n, MIN(_pos) AS first_pos
+            FROM {rel} WHERE {col} IS NOT NULL GROUP BY {key}, {col}
+        ) QUALIFY row_number() OVER (PARTITION BY {key} ORDER BY n DESC, first_pos) = 1
+    """
+
+
+def aggregate_geolocation(cursor, bronze):
+    """1 linha por CEP (ordenada pelo CEP): média das coordenadas e moda de cidade/UF.
+
+    Devolve DataFrame: o resultado tem uma linha por CEP, não por registro da Bronze.
+    """
+    key = 'geolocation_zip_code_prefix'
+    # favg: soma compensada (Kahan), como a média do groupby do pandas
+    return fetch_df(cursor, f"""
+        WITH geo AS (
+            SELECT {zfill(key)} AS {key}, geolocation_lat, geolocation_lng, geolocation_city, geolocation_state, _pos
+            FROM {bronze}
+        ),
+        means AS (
+            SELECT {key}, favg(geolocation_lat) AS geolocation_lat, favg(geolocation_lng) AS geolocation_lng
+            FROM geo GROUP BY {key}
+        )
+        SELECT m.{key}, c.geolocation_city, s.geolocation_state, m.geolocation_lat, m.geolocation_lng
+        FROM means m
+        LEFT JOIN ({most_frequent_sql('geo', key, 'geolocation_city')}) c USING ({key})
+        LEFT JOIN ({most_frequent_sql('geo', key, 'geolocation_state')}) s USING ({key})
+        ORDER BY m.{key}
+    """)
+
+
+def orders(bronze):
+    # TIMESTAMP (microssegundos): mesma unidade que process_orders fixa no pandas
+    dates = ", ".join(f"TRY_CAST({col} AS TIMESTAMP) AS {col}" for col in DATE_COLUMNS)
+    return f"""
+        WITH o AS (SELECT * REPLACE ({dates}) FROM {bronze})
+        SELECT *,
+               {days_between('order_purchase_timestamp', 'order_delivered_customer_date')} AS delivery_days,
+               {days_between('order_estimated_delivery_date', 'order_delivered_customer_date')} AS delay_diff_days,
+               CASE WHEN {days_between('order_estimated_delivery_date', 'order_delivered_customer_date')} > 0
+                    THEN 1 ELSE 0 END AS is_delayed
+        FROM o
+    """
+
+
+def products(cursor, bronze, normalize):
+    """Dimensões nulas ou zeradas -> mediana dos valores positivos; categoria nula -> 'outros', normalizada."""
+    category = "coalesce(product_category_name, 'outros')"
+    register_mapping(cursor, 'product_categories', fetch_df(cursor, f"SELECT DISTINCT {category} AS v FROM {bronze}")['v'],
+                     normalize)
+    medians = ", ".join(f"median(CAST({col} AS DOUBLE)) FILTER (WHERE {col} > 0) AS {col}" for col in PRODUCT_DIM_COLUMNS)
+    filled = ", ".join(f"coalesce(nullif(p.{col}, 0), m.{col}) AS {col}" for col in PRODUCT_DIM_COLUMNS)
+    return f"""
+        WITH p AS {bronze},
+        m AS (SELECT {medians} FROM p),
+        filled AS (
+            SELECT p.* REPLACE (c.mapped AS product_category_name, {filled})
+            FROM p CROSS JOIN m
+            LEFT JOIN product_categories c ON c.value = coalesce(p.product_category_name, 'outros')
+        )
+        SELECT *, product_length_cm * product_height_cm * product_width_cm AS volume_cm3 FROM filled
+    """
+
+
+def with_geo_reference(cursor, bronze, prefix, df_geo_ref, normalize):
+    """Entidade (clientes/vendedores) com CEP padronizado, left join na referência de CEPs,
+    city_final (cidade da referência ou a própria, normalizada) e location_full.
+    """
+    zip_col, city_col, state_col = f'{prefix}_zip_code_prefix', f'{prefix}_city', f'{prefix}_state'
+    cursor.register('geo_ref', df_geo_ref)
+    joined = f"""(
+        SELECT b.* REPLACE ({zfill(f'b.{zip_col}')} AS {zip_col}), g.*
+        FROM {bronze} b
+        LEFT JOIN geo_ref g ON g.geolocation_zip_code_prefix = {zfill(f'b.{zip_col}')}
+    )"""
+
+    # Só as cidades sem referência são normalizadas (como no pandas)
+    cities = fetch_df(cursor, f"SELECT DISTINCT {city_col} AS v FROM {joined} WHERE geolocation_city_normalized IS NULL")
+    register_mapping(cursor, 'city_map', cities['v'], normalize)
+    city_final = "coalesce(CAST(j.geolocation_city_normalized AS VARCHAR), m.mapped)"
+    titles = fetch_df(cursor, f"""
+        SELECT DISTINCT {city_final} AS v FROM {joined} j LEFT JOIN city_map m ON m.value = j.{city_col}
+    """)['v']
+    register_mapping(cursor, 'city_titles', titles, lambda s: s.str.title())
+
+    return f"""
+        SELECT j.*, {city_final} AS city_final, t.mapped || ', ' || upper(j.{state_col}) || ', Brazil' AS location_full
+        FROM {joined} j
+        LEFT JOIN city_map m ON m.value = j.{city_col}
+        LEFT JOIN city_titles t ON t.value = {city_final}
+    """
+
+
+def order_items(bronze):
+    return f"SELECT *, price + freight_value AS total_value FROM {bronze}"
+
+
+def order_payments(bronze):
+    return f"SELECT * FROM {bronze} WHERE payment_value > 0"
+
+
+def order_reviews(bronze):
+    """Quebras de linha do comentário viram espaço; 'nan'/'None' (texto de nulos no pandas) viram nulo."""
+    message = "replace(replace(CAST(review_comment_message AS VARCHAR), chr(10), ' '), chr(13), ' ')"
+    cleaned = f"CASE WHEN {message} IN ('nan', 'None') THEN NULL ELSE {message} END"
+    return f"""
+        SELECT * REPLACE ({cleaned} AS review_comment_message),
+               CASE WHEN {cleaned} IS NOT NULL THEN 1 ELSE 0 END AS has_comment
+        FROM {bronze}
+    """
+
+
+def route_distances(cursor, bucket):
+    """Distância por par distinto (CEP vendedor, CEP cliente) e o total de pares pedido/vendedor.
+
+    Os pares ficam numa tabela temporária do DuckDB (com spill em disco), lida para a contagem e
+    pela consulta devolvida. As coordenadas são a média por CEP, então cada par tem um único
+    valor (any_value); pares sem coordenadas ficam de fora, como em build_route_distances.
+    """
+    def scan(table):
+        return f"read_parquet('s3://{bucket}/{table}/{table}.parquet')"
+
+    cursor.execute(f"""
+        CREATE OR REPLACE TEMP TABLE route_pairs AS
+        WITH routes AS (
+            SELECT c.customer_zip_code_prefix, c.geolocation_lat AS lat_cust, c.geolocation_lng AS lng_cust,
+                   s.seller_zip_code_prefix, s.geolocation_lat AS lat_sell, s.geolocation_lng AS lng_sell
+            FROM (SELECT DISTINCT order_id, seller_id FROM {scan('olist_order_items')}) i
+            JOIN {scan('olist_orders')} o ON o.order_id = i.order_id
+            JOIN {scan('olist_customers')} c ON c.customer_id = o.customer_id
+            JOIN {scan('olist_sellers')} s ON s.seller_id = i.seller_id
+        )
+        SELECT seller_zip_code_prefix, customer_zip_code_prefix,
+               {haversine('any_value(lat_cust)', 'any_value(lng_cust)', 'any_value(lat_sell)', 'any_value(lng_sell)')}
+                   AS distancia_km,
+               COUNT(*) AS n_routes
+        FROM routes GROUP BY seller_zip_code_prefix, customer_zip_code_prefix
+    """)
+    total_routes = cursor.execute("SELECT coalesce(sum(n_routes), 0) FROM route_pairs").fetchone()[0]
+    return """
+        SELECT seller_zip_code_prefix, customer_zip_code_prefix, distancia_km,
+               row_number() OVER (ORDER BY seller_zip_code_prefix, customer_zip_code_prefix) AS _pos
+        FROM route_pairs WHERE distancia_km IS NOT NULL
+    """, int(total_routes)
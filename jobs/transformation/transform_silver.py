@@ -3,10 +3,27 @@ import numpy as np
 import unicodedata
 import logging
 import boto3
+import s3fs
+import argparse
+import hashlib
+import json
+import os
 import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.route_distance import ROUTE_DISTANCE_TABLE, build_route_distances
+from common.metrics import track, record, flush_metrics
+from common.parquet_policy import write_parquet
+from common.dtypes import compact_dtypes, memory_report
+from common.duckdb_engine import ENGINE, ENGINES, duckdb_cursor, parquet_scan, copy_to_parquet
+import silver_duckdb
 
 # Configurações de Ambiente
-MINIO_ENDPOINT = "http://minio:9000"
+MINIO_ENDPOINT = os.environ.get("OLIST_MINIO_ENDPOINT", "http://minio:9000")
 MINIO_ACCESS_KEY = "admin"
 MINIO_SECRET_KEY = "admin12345"
 BRONZE_BUCKET = "bronze"
@@ -18,6 +35,23 @@ storage_options = {
     "client_kwargs": {"endpoint_url": MINIO_ENDPOINT}
 }
 
+# Chave primária das tabelas Bronze (deduplicação das partições incrementais)
+BRONZE_KEYS = {
+    "olist_orders": ["order_id"],
+    "olist_order_items": ["order_id", "order_item_id"],
+    "olist_order_payments": ["order_id", "payment_sequential"],
+    "olist_products": ["product_id"],
+    "olist_customers": ["customer_id"],
+    "olist_sellers": ["seller_id"],
+    "olist_order_reviews": ["review_id", "order_id"],
+    "olist_geolocation": None
+}
+
+# Cache da referência de CEPs: incrementar ao mudar a lógica de create_geo_reference
+GEO_REF_VERSION = 1
+GEO_REF_CACHE_META = f"{SILVER_BUCKET}/olist_geolocation_ref/_cache.json"
+geo_cache_stats = {"hits": 0, "misses": 0}
+
 # Funções Auxiliares
 
 def normalize_text(text):
@@ -30,49 +64,198 @@ def normalize_text(text):
     text = re.sub(r'\s+', ' ', text).strip()
     return text
 
+# Cache de normalize_series: texto original -> texto normalizado (vale para toda a execução).
+# Só chaves str: 1, 1.0 e True são a mesma chave de dict, mas normalize_text dá '1', '1.0' e 'true'
+_normalize_cache = {}
+
+def normalize_series(series):
+    """Versão vetorizada de normalize_text, com o mesmo resultado valor a valor.
+
+    Normaliza apenas os valores únicos ainda não vistos na execução (cidades e categorias
+    se repetem muito entre tabelas) e mapeia o resultado de volta. Usa o accessor .str do
+    pandas, que segue a semântica de str/re do Python; os kernels regex do pyarrow (RE2)
+    tratam espaços Unicode de forma diferente e quebrariam a equivalência.
+    """
+    uniques = series.dropna().unique()
+    if not all(isinstance(value, str) for value in uniques):
+        # Valores não textuais: valor a valor, sem cache nem dict de mapeamento (1 == True)
+        result = series.map(normalize_text).astype(object)
+        result[series.isna()] = None
+        return result
+
+    pending = [value for value in uniques if value not in _normalize_cache]
+    if pending:
+        normalized = (pd.Series(pending, dtype=object).astype(str)
+                      .str.lower()
+                      .str.normalize('NFKD')
+                      .str.encode('ascii', 'ignore').str.decode('utf-8')
+                      .str.replace(r'[/,-]', ' ', regex=True)
+                      .str.replace(r'(\s+[a-z]{2})+$', '', regex=True)
+                      .str.replace(r'\s+', ' ', regex=True)
+                      .str.strip())
+        _normalize_cache.update(zip(pending, normalized))
+
+    result = series.map({value: _normalize_cache[value] for value in uniques}).astype(object)
+    result[series.isna()] = None
+    return result
+
+def bronze_paths(table_name):
+    """Snapshot da Bronze seguido das partições incrementais, em ordem de ingestão."""
+    fs = s3fs.S3FileSystem(**storage_options)
+    partitions = sorted(fs.glob(f"{BRONZE_BUCKET}/{table_name}/ingestion_date=*/*.parquet"))
+    return [f"{BRONZE_BUCKET}/{table_name}/{table_name}.parquet"] + partitions
+
+def read_bronze(table_name):
+    """Lê o snapshot da Bronze e, se houver, as partições incrementais (ingestion_date=...),
+    mantendo a versão mais recente de cada chave."""
+    base_path, *partitions = bronze_paths(table_name)
+    fs = s3fs.S3FileSystem(**storage_options)
+    record(bytes_read=sum(fs.size(path) for path in [base_path] + partitions))
+    if not partitions:
+        df = pd.read_parquet(f"s3://{base_path}", storage_options=storage_options)
+        record(rows_in=len(df))
+        return df
+
+    frames = [pd.read_parquet(f"s3://{path}", storage_options=storage_options) for path in [base_path] + partitions]
+    record(rows_in=sum(len(frame) for frame in frames))
+    df = pd.concat(frames, ignore_index=True).sort_values('ingestion_date', kind='stable')
+    keys = BRONZE_KEYS.get(table_name)
+    if keys:
+        df = df.drop_duplicates(subset=keys, keep='last')
+    return df.reset_index(drop=True)
+
+def bronze_relation(table_name):
+    """read_bronze do motor duckdb: cursor e subconsulta SQL sobre os mesmos arquivos, sem ler no pandas."""
+    paths = bronze_paths(table_name)
+    fs = s3fs.S3FileSystem(**storage_options)
+    record(bytes_read=sum(fs.size(path) for path in paths))
+    cursor = duckdb_cursor(storage_options)
+    record(rows_in=cursor.execute(f"SELECT count(*) FROM {parquet_scan(paths)}").fetchone()[0])
+    return cursor, silver_duckdb.bronze_sql(paths, BRONZE_KEYS.get(table_name))
+
 def save_to_minio(df, table_name):
     output_path = f"s3://{SILVER_BUCKET}/{table_name}/{table_name}.parquet"
     print(f"Salvando {table_name} na Silver...")
     try:
-        df.to_parquet(output_path, index=False, storage_options=storage_options)
+        df = compact_dtypes(df, table_name)
+        write_parquet(df, output_path, table_name, "silver", storage_options=storage_options)
+        record(rows_out=len(df), bytes_written=s3fs.S3FileSystem(**storage_options).size(output_path))
     except Exception as e:
         print(f"Erro ao salvar {table_name}: {e}")
+        raise
+
+def copy_to_silver(cursor, sql, table_name):
+    """save_to_minio do motor duckdb: o resultado da consulta vai direto do DuckDB para a Silver."""
+    output_path = f"{SILVER_BUCKET}/{table_name}/{table_name}.parquet"
+    print(f"Salvando {table_name} na Silver (duckdb)...")
+    try:
+        rows = copy_to_parquet(cursor, sql, output_path, table_name, "silver")
+        record(rows_out=rows, bytes_written=s3fs.S3FileSystem(**storage_options).size(output_path))
+    except Exception as e:
+        print(f"Erro ao salvar {table_name}: {e}")
+        raise
+
+def most_frequent_by_group(df, key, col):
+    """Moda de `col` por `key` sem lambdas por grupo.
+
+    Conta (key, col) em um único groupby e ordena por contagem; o empate é resolvido pela
+    primeira ocorrência no grupo, como em x.value_counts().index[0].
+    """
+    pairs = df[[key, col]].assign(_pos=np.arange(len(df)))
+    counts = (pairs.groupby([key, col], sort=False)
+              .agg(_count=('_pos', 'size'), _first=('_pos', 'min'))
+              .reset_index())
+    counts = counts.sort_values([key, '_count', '_first'], ascending=[True, False, True])
+    return counts.drop_duplicates(subset=key).set_index(key)[col]
 
 # 1. Consolidação da Geolocalização 
 
-def create_geo_reference():
-    """Cria referência com 1 linha por CEP para saneamento de cidades."""
+def aggregate_geolocation(df):
+    """Agregação por CEP: Média para coordenadas e Moda para nomes."""
+    key = 'geolocation_zip_code_prefix'
+    df_geo = df.groupby(key).agg({'geolocation_lat': 'mean', 'geolocation_lng': 'mean'})
+    df_geo.insert(0, 'geolocation_city', most_frequent_by_group(df, key, 'geolocation_city').reindex(df_geo.index))
+    df_geo.insert(1, 'geolocation_state', most_frequent_by_group(df, key, 'geolocation_state').reindex(df_geo.index))
+    return df_geo.reset_index()
+
+def bronze_fingerprint(table_name):
+    """Impressão digital da entrada Bronze: ETag e tamanho de cada arquivo + versão da lógica."""
+    fs = s3fs.S3FileSystem(**storage_options)
+    digest = hashlib.sha256(f"v{GEO_REF_VERSION}".encode())
+    for path in bronze_paths(table_name):
+        info = fs.info(path)
+        digest.update(f"{path}|{info.get('ETag')}|{info.get('size')}".encode())
+    return digest.hexdigest()
+
+def load_cached_geo_reference(fingerprint):
+    """Retorna a referência salva se ela foi gerada a partir da mesma entrada Bronze."""
+    fs = s3fs.S3FileSystem(**storage_options)
+    if not fs.exists(GEO_REF_CACHE_META):
+        return None
+    with fs.open(GEO_REF_CACHE_META, 'r') as f:
+        meta = json.load(f)
+    if meta.get('fingerprint') != fingerprint:
+        return None
+    return pd.read_parquet(f"s3://{SILVER_BUCKET}/olist_geolocation_ref/olist_geolocation_ref.parquet",
+                           storage_options=storage_options)
+
+def geo_cache_report():
+    total = geo_cache_stats['hits'] + geo_cache_stats['misses']
+    print(f"Cache da referencia de CEPs: {geo_cache_stats['hits']} hit(s), "
+          f"{geo_cache_stats['misses']} miss(es) em {total} chamada(s)")
+    return dict(geo_cache_stats)
+
+def create_geo_reference(use_cache=True):
+    """Cria referência com 1 linha por CEP para saneamento de cidades.
+
+    Com use_cache, reaproveita a referência já salva na Silver quando a geolocalização da
+    Bronze não mudou (mesma impressão digital), pulando agregação e normalização.
+    """
     print("Processando Referencia de Geolocalizacao (CEP unico)")
-    path = f"s3://{BRONZE_BUCKET}/olist_geolocation/olist_geolocation.parquet"
-    df = pd.read_parquet(path, storage_options=storage_options)
-    
-    # Garantia de tipo para o join
-    df['geolocation_zip_code_prefix'] = df['geolocation_zip_code_prefix'].astype(str).str.zfill(5)
-    
-    # Agregação por CEP: Média para coordenadas e Moda para nomes
-    agg_logic = {
-        'geolocation_city': lambda x: x.value_counts().index[0] if not x.empty else None,
-        'geolocation_state': lambda x: x.value_counts().index[0] if not x.empty else None,
-        'geolocation_lat': 'mean',
-        'geolocation_lng': 'mean'
-    }
-    
-    df_geo = df.groupby('geolocation_zip_code_prefix').agg(agg_logic).reset_index()
-    df_geo['geolocation_city_normalized'] = df_geo['geolocation_city'].apply(normalize_text)
+    fingerprint = bronze_fingerprint("olist_geolocation")
+    if use_cache:
+        df_geo = load_cached_geo_reference(fingerprint)
+        if df_geo is not None:
+            geo_cache_stats['hits'] += 1
+            print(f"Referencia de CEPs reaproveitada do cache ({len(df_geo)} CEPs)")
+            return df_geo
+    geo_cache_stats['misses'] += 1
+
+    if ENGINE == "duckdb":
+        df_geo = silver_duckdb.aggregate_geolocation(*bronze_relation("olist_geolocation"))
+    else:
+        df = read_bronze("olist_geolocation")
+
+        # Garantia de tipo para o join
+        df['geolocation_zip_code_prefix'] = df['geolocation_zip_code_prefix'].astype(str).str.zfill(5)
+
+        df_geo = aggregate_geolocation(df)
+    df_geo['geolocation_city_normalized'] = normalize_series(df_geo['geolocation_city'])
     
+    # Metadado gravado só depois da referência salva com sucesso
     save_to_minio(df_geo, "olist_geolocation_ref")
+    fs = s3fs.S3FileSystem(**storage_options)
+    with fs.open(GEO_REF_CACHE_META, 'w') as f:
+        json.dump({'fingerprint': fingerprint, 'rows': len(df_geo)}, f)
     return df_geo
 
 # 2. Processamento por Tabela
 
 def process_orders():
     print("Processando Orders (SLA e Atraso)")
-    df = pd.read_parquet(f"s3://{BRONZE_BUCKET}/olist_orders/olist_orders.parquet", storage_options=storage_options)
+    if ENGINE == "duckdb":
+        cursor, bronze = bronze_relation("olist_orders")
+        copy_to_silver(cursor, silver_duckdb.orders(bronze), 'olist_orders')
+        return
+
+    df = read_bronze("olist_orders")
     
     date_cols = ['order_purchase_timestamp', 'order_approved_at', 'order_delivered_carrier_date',
                  'order_delivered_customer_date', 'order_estimated_delivery_date']
+    # Unidade fixa em microssegundos (a do DATETIME da origem e do TIMESTAMP do motor duckdb):
+    # o pandas infere ns ou us conforme a versão
     for col in date_cols:
-        df[col] = pd.to_datetime(df[col], errors="coerce")
+        df[col] = pd.to_datetime(df[col], errors="coerce").astype("datetime64[us]")
 
     df['delivery_days'] = (df['order_delivered_customer_date'] - df['order_purchase_timestamp']).dt.days
     df['delay_diff_days'] = (df['order_delivered_customer_date'] - df['order_estimated_delivery_date']).dt.days
@@ -85,9 +268,14 @@ def process_orders():
 
 def process_products():
     print("Processando Products (Mediana e Volume)")
-    df = pd.read_parquet(f"s3://{BRONZE_BUCKET}/olist_products/olist_products.parquet", storage_options=storage_options)
+    if ENGINE == "duckdb":
+        cursor, bronze = bronze_relation("olist_products")
+        copy_to_silver(cursor, silver_duckdb.products(cursor, bronze, normalize_series), "olist_products")
+        return
+
+    df = read_bronze("olist_products")
     
-    df['product_category_name'] = df['product_category_name'].fillna('outros').apply(normalize_text)
+    df['product_category_name'] = normalize_series(df['product_category_name'].fillna('outros'))
 
     cols_dims = ['product_weight_g', 'product_length_cm', 'product_height_cm', 'product_width_cm']
     for col in cols_dims:
@@ -103,11 +291,17 @@ def process_customers_sellers(df_geo_ref):
 
     for entity in ['customers', 'sellers']:
         prefix = 'customer' if entity == 'customers' else 'seller'
-        df = pd.read_parquet(f"s3://{BRONZE_BUCKET}/olist_{entity}/olist_{entity}.parquet", storage_options=storage_options)
-        
+        if ENGINE == "duckdb":
+            cursor, bronze = bronze_relation(f"olist_{entity}")
+            sql = silver_duckdb.with_geo_reference(cursor, bronze, prefix, df_geo_ref, normalize_series)
+            copy_to_silver(cursor, sql, f"olist_{entity}")
+            continue
+
+        df = read_bronze(f"olist_{entity}")
+
         # Padronização da chave para o merge
         df[f'{prefix}_zip_code_prefix'] = df[f'{prefix}_zip_code_prefix'].astype(str).str.zfill(5)
-        
+
         df = pd.merge(
             df,
             df_geo_ref,
@@ -116,10 +310,11 @@ def process_customers_sellers(df_geo_ref):
             how='left'
         )
         
-        # Priorização da cidade saneada via Geolocation
-        df['city_final'] = np.where(df['geolocation_city_normalized'].notna(),
+        # Priorização da cidade saneada via Geolocation (normaliza só as linhas sem referência)
+        has_geo_city = df['geolocation_city_normalized'].notna()
+        df['city_final'] = np.where(has_geo_city,
                                      df['geolocation_city_normalized'],
-                                     df[f'{prefix}_city'].apply(normalize_text))
+                                     normalize_series(df[f'{prefix}_city'].where(~has_geo_city)))
         
         df['location_full'] = df['city_final'].str.title() + ", " + df[f'{prefix}_state'].str.upper() + ", Brazil"
         
@@ -127,19 +322,31 @@ def process_customers_sellers(df_geo_ref):
 
 def process_items_payments():
     print("Processando Items e Payments")
+    if ENGINE == "duckdb":
+        cursor, bronze = bronze_relation("olist_order_items")
+        copy_to_silver(cursor, silver_duckdb.order_items(bronze), "olist_order_items")
+        cursor, bronze = bronze_relation("olist_order_payments")
+        copy_to_silver(cursor, silver_duckdb.order_payments(bronze), "olist_order_payments")
+        return
+
     # Items
-    df_items = pd.read_parquet(f"s3://{BRONZE_BUCKET}/olist_order_items/olist_order_items.parquet", storage_options=storage_options)
+    df_items = read_bronze("olist_order_items")
     df_items['total_value'] = df_items['price'] + df_items['freight_value']
     save_to_minio(df_items, "olist_order_items")
 
     # Payments
-    df_pay = pd.read_parquet(f"s3://{BRONZE_BUCKET}/olist_order_payments/olist_order_payments.parquet", storage_options=storage_options)
+    df_pay = read_bronze("olist_order_payments")
     df_pay = df_pay[df_pay['payment_value'] > 0]
     save_to_minio(df_pay, "olist_order_payments")
 
 def process_reviews():
     print("Processando Reviews")
-    df_rev = pd.read_parquet(f"s3://{BRONZE_BUCKET}/olist_order_reviews/olist_order_reviews.parquet", storage_options=storage_options)
+    if ENGINE == "duckdb":
+        cursor, bronze = bronze_relation("olist_order_reviews")
+        copy_to_silver(cursor, silver_duckdb.order_reviews(bronze), 'olist_order_reviews')
+        return
+
+    df_rev = read_bronze("olist_order_reviews")
     
     if 'review_comment_message' in df_rev.columns:
         df_rev['review_comment_message'] = df_rev['review_comment_message'].astype(str)\
@@ -149,9 +356,172 @@ def process_reviews():
     df_rev['has_comment'] = np.where(df_rev['review_comment_message'].notnull(), 1, 0)
     save_to_minio(df_rev, 'olist_order_reviews')
 
+def create_route_distances(*_upstream):
+    """Índice de distâncias por par (CEP vendedor, CEP cliente) das rotas presentes nos pedidos.
+
+    Lê da Silver já gravada (pedidos, itens, clientes e vendedores) só as colunas da rota.
+    A Gold faz join nele para a distancia_km de fato_vendas, em vez de trigonometria por linha.
+    """
+    print("Processando Indice de Distancias (CEP vendedor x CEP cliente)")
+    if ENGINE == "duckdb":
+        # Joins, pares distintos e distância no DuckDB
+        cursor = duckdb_cursor(storage_options)
+        sql, total_routes = silver_duckdb.route_distances(cursor, SILVER_BUCKET)
+        copy_to_silver(cursor, sql, ROUTE_DISTANCE_TABLE)
+        print(f"Indice de distancias: {total_routes:,} pares pedido/vendedor (duckdb)")
+        return
+
+    def read_silver_columns(table, columns):
+        return compact_dtypes(pd.read_parquet(f"s3://{SILVER_BUCKET}/{table}/{table}.parquet", columns=columns,
+                                              storage_options=storage_options))
+
+    geo_cols = ['geolocation_lat', 'geolocation_lng']
+    items = read_silver_columns("olist_order_items", ['order_id', 'seller_id']).drop_duplicates()
+    orders = read_silver_columns("olist_orders", ['order_id', 'customer_id'])
+    customers = read_silver_columns("olist_customers", ['customer_id', 'customer_zip_code_prefix'] + geo_cols)
+    sellers = read_silver_columns("olist_sellers", ['seller_id', 'seller_zip_code_prefix'] + geo_cols)
+
+    routes = items.merge(orders, on='order_id') \
+                  .merge(customers, on='customer_id') \
+                  .merge(sellers, on='seller_id', suffixes=('_cust', '_sell'))
+    df_routes = build_route_distances(routes)
+    save_to_minio(df_routes, ROUTE_DISTANCE_TABLE)
+    print(f"Indice de distancias: {len(df_routes):,} rotas distintas para {len(routes):,} pares pedido/vendedor "
+          f"({df_routes.memory_usage(deep=True).sum() / 1024**2:.1f} MB)")
+
+# 3. Orquestração (grafo de dependências)
+
+# Entradas/saídas de cada etapa. Uma etapa depende das etapas que produzem suas entradas e
+# recebe, como argumentos, os retornos delas (na ordem de `inputs`).
+SILVER_STEPS = [
+    {"name": "geo_reference", "fn": create_geo_reference,
+     "inputs": ["bronze.olist_geolocation"], "outputs": ["silver.olist_geolocation_ref"]},
+    {"name": "orders", "fn": process_orders,
+     "inputs": ["bronze.olist_orders"], "outputs": ["silver.olist_orders"]},
+    {"name": "products", "fn": process_products,
+     "inputs": ["bronze.olist_products"], "outputs": ["silver.olist_products"]},
+    {"name": "customers_sellers", "fn": process_customers_sellers,
+     "inputs": ["silver.olist_geolocation_ref", "bronze.olist_customers", "bronze.olist_sellers"],
+     "outputs": ["silver.olist_customers", "silver.olist_sellers"]},
+    {"name": "items_payments", "fn": process_items_payments,
+     "inputs": ["bronze.olist_order_items", "bronze.olist_order_payments"],
+     "outputs": ["silver.olist_order_items", "silver.olist_order_payments"]},
+    {"name": "route_distances", "fn": create_route_distances,
+     "inputs": ["silver.olist_orders", "silver.olist_order_items", "silver.olist_customers", "silver.olist_sellers"],
+     "outputs": [f"silver.{ROUTE_DISTANCE_TABLE}"]},
+    {"name": "reviews", "fn": process_reviews,
+     "inputs": ["bronze.olist_order_reviews"], "outputs": ["silver.olist_order_reviews"]},
+]
+
+def resolve_dependencies(steps):
+    """Mapeia cada etapa para as etapas que produzem suas entradas (valida ciclos)."""
+    producers = {}
+    for step in steps:
+        for output in step['outputs']:
+            if output in producers:
+                raise ValueError(f"Saída {output} produzida por {producers[output]} e {step['name']}")
+            producers[output] = step['name']
+
+    deps = {step['name']: list(dict.fromkeys(producers[i] for i in step['inputs'] if i in producers))
+            for step in steps}
+
+    visiting, done = set(), set()
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Ciclo de dependências envolvendo {name}")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+    for name in deps:
+        visit(name)
+    return deps
+
+def run_steps(steps, workers=4):
+    """Executa as etapas em paralelo respeitando as dependências.
+
+    Etapas independentes rodam ao mesmo tempo em um pool de threads; se uma etapa falha,
+    as que dependem dela são puladas e as demais continuam. Ao final imprime os tempos e
+    o caminho crítico, e levanta RuntimeError se alguma etapa não foi concluída.
+    """
+    by_name = {step['name']: step for step in steps}
+    deps = resolve_dependencies(steps)
+    results, durations, errors, skipped = {}, {}, {}, set()
+    pending = set(by_name)
+    running = {}
+    start = time.perf_counter()
+
+    def call(step, args):
+        step_start = time.perf_counter()
+        try:
+            with track("silver", step['name']):
+                return step['fn'](*args)
+        finally:
+            durations[step['name']] = time.perf_counter() - step_start
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name in sorted(pending):
+                if any(dep in errors or dep in skipped for dep in deps[name]):
+                    print(f"Etapa {name} pulada (dependência falhou)")
+                    skipped.add(name)
+                    pending.discard(name)
+                elif all(dep in results for dep in deps[name]):
+                    args = [results[dep] for dep in deps[name]]
+                    running[pool.submit(call, by_name[name], args)] = name
+                    pending.discard(name)
+
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logging.exception(f"Etapa {name} falhou")
+                    errors[name] = e
+
+    wall = time.perf_counter() - start
+
+    # Caminho crítico: maior soma de tempos ao longo das dependências
+    path_time, path_prev = {}, {}
+    def longest(name):
+        if name not in path_time:
+            prev = max(deps[name], key=longest, default=None)
+            path_time[name] = durations.get(name, 0.0) + (path_time[prev] if prev else 0.0)
+            path_prev[name] = prev
+        return path_time[name]
+    last = max(by_name, key=longest)
+    critical = []
+    while last:
+        critical.insert(0, last)
+        last = path_prev[last]
+
+    print(f"Resumo Silver ({workers} workers): {wall:.1f}s de parede, {sum(durations.values()):.1f}s somados")
+    for name in by_name:
+        status = 'ERRO' if name in errors else 'PULADA' if name in skipped else 'OK'
+        print(f"   {name:<20} {status:<7} {durations.get(name, 0.0):8.1f}s")
+    print(f"   Caminho crítico: {' -> '.join(critical)} ({path_time[critical[-1]]:.1f}s)")
+
+    if errors or skipped:
+        raise RuntimeError(f"Etapas com falha: {sorted(errors)}; puladas: {sorted(skipped)}")
+    return results
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    print("Iniciando Transformacao Silver...")
+
+    parser = argparse.ArgumentParser(description="Transformação Bronze -> Silver")
+    parser.add_argument("--workers", type=int, default=4, help="etapas executadas em paralelo")
+    parser.add_argument("--engine", choices=ENGINES, default=ENGINE,
+                        help="pandas: DataFrames em memória; duckdb: SQL direto sobre os Parquet da Bronze")
+    args = parser.parse_args()
+    ENGINE = args.engine
+
+    print(f"Iniciando Transformacao Silver (motor {ENGINE})...")
 
     s3 = boto3.client('s3', endpoint_url=MINIO_ENDPOINT, aws_access_key_id=MINIO_ACCESS_KEY, aws_secret_access_key=MINIO_SECRET_KEY)
     try:
@@ -159,12 +529,11 @@ if __name__ == "__main__":
     except:
         s3.create_bucket(Bucket=SILVER_BUCKET)
 
-    geo_ref = create_geo_reference()
-
-    process_orders()
-    process_products()
-    process_customers_sellers(geo_ref)
-    process_items_payments()
-    process_reviews()
+    try:
+        run_steps(SILVER_STEPS, workers=args.workers)
+    finally:
+        flush_metrics()
 
+    geo_cache_report()
+    memory_report()
     print("Processamento Silver Concluido.")
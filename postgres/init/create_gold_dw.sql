@@ -55,13 +55,16 @@ CREATE TABLE IF NOT EXISTS fato_vendas (
     delivery_days INTEGER,
     delay_diff_days INTEGER,
     is_delayed INTEGER,
+    distancia_km DECIMAL(10, 2),
     
-    PRIMARY KEY (order_id, order_item_id),
-    CONSTRAINT fk_vendas_calendario FOREIGN KEY (data_venda) REFERENCES dim_calendario(id_data),
+    -- Particionada por mês (RANGE em fk_data_venda): a PK precisa conter a chave de partição.
+    -- As partições fato_vendas_YYYYMM são criadas e trocadas por jobs/transformation/gold_partitions.py
+    PRIMARY KEY (order_id, order_item_id, fk_data_venda),
+    CONSTRAINT fk_vendas_calendario FOREIGN KEY (fk_data_venda) REFERENCES dim_calendario(id_data),
     CONSTRAINT fk_vendas_produtos FOREIGN KEY (product_id) REFERENCES dim_produtos(product_id),
     CONSTRAINT fk_vendas_vendedores FOREIGN KEY (seller_id) REFERENCES dim_vendedores(seller_id),
     CONSTRAINT fk_vendas_clientes FOREIGN KEY (customer_id) REFERENCES dim_clientes(customer_id)
-);
+) PARTITION BY RANGE (fk_data_venda);
 
 CREATE TABLE IF NOT EXISTS fato_pagamentos (
     order_id VARCHAR(50) NOT NULL,
@@ -95,9 +98,90 @@ CREATE TABLE IF NOT EXISTS dim_ml_feature_importance (
     importance DOUBLE PRECISION
 );
 
-CREATE INDEX IF NOT EXISTS idx_vendas_data ON fato_vendas(data_venda);
+-- Controle da carga incremental (modo merge): hash da última versão carregada de cada linha
+CREATE TABLE IF NOT EXISTS gold_row_hashes (
+    table_name VARCHAR(100) NOT NULL,
+    row_key VARCHAR(255) NOT NULL,
+    row_hash BIGINT NOT NULL,
+    PRIMARY KEY (table_name, row_key)
+);
+
+-- Hash e contagem de cada partição mensal carregada (só meses alterados são reconstruídos)
+CREATE TABLE IF NOT EXISTS gold_partition_hashes (
+    table_name VARCHAR(100) NOT NULL,
+    partition_name VARCHAR(100) NOT NULL,
+    row_hash BIGINT NOT NULL,
+    row_count BIGINT NOT NULL,
+    PRIMARY KEY (table_name, partition_name)
+);
+
+-- Agregados para dashboards (atualizados por jobs/transformation/gold_rollups.py)
+CREATE TABLE IF NOT EXISTS gold_rollup_pendentes (
+    id_data INTEGER PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS agg_vendas_diario (
+    id_data INTEGER NOT NULL REFERENCES dim_calendario(id_data),
+    customer_state CHAR(2) NOT NULL,
+    regiao VARCHAR(20) NOT NULL,
+    product_category_name VARCHAR(100) NOT NULL,
+    qtd_pedidos INTEGER NOT NULL,
+    qtd_itens INTEGER NOT NULL,
+    receita DECIMAL(14, 2),
+    valor_frete DECIMAL(14, 2),
+    qtd_entregues INTEGER NOT NULL,
+    soma_dias_entrega BIGINT,
+    qtd_atrasados INTEGER NOT NULL,
+    qtd_avaliacoes INTEGER NOT NULL,
+    soma_notas DOUBLE PRECISION,
+    PRIMARY KEY (id_data, customer_state, product_category_name)
+);
+
+CREATE TABLE IF NOT EXISTS agg_vendedor_mensal (
+    seller_id VARCHAR(50) NOT NULL,
+    id_mes INTEGER NOT NULL REFERENCES dim_calendario(id_data),
+    seller_state CHAR(2),
+    qtd_pedidos INTEGER NOT NULL,
+    qtd_itens INTEGER NOT NULL,
+    receita DECIMAL(14, 2),
+    qtd_entregues INTEGER NOT NULL,
+    qtd_atrasados INTEGER NOT NULL,
+    qtd_avaliacoes INTEGER NOT NULL,
+    soma_notas DOUBLE PRECISION,
+    PRIMARY KEY (seller_id, id_mes)
+);
+
+-- Métricas de execução por etapa do pipeline (gravadas por jobs/common/metrics.py)
+CREATE TABLE IF NOT EXISTS pipeline_run_metrics (
+    id BIGSERIAL PRIMARY KEY,
+    run_id VARCHAR(255) NOT NULL,
+    task_id VARCHAR(100),
+    stage VARCHAR(20) NOT NULL,
+    step VARCHAR(100) NOT NULL,
+    parent_step VARCHAR(100),
+    started_at TIMESTAMP NOT NULL,
+    duration_s DOUBLE PRECISION,
+    status VARCHAR(10) NOT NULL,
+    error TEXT,
+    rows_in BIGINT,
+    rows_out BIGINT,
+    bytes_read BIGINT,
+    bytes_written BIGINT,
+    db_load_s DOUBLE PRECISION,
+    peak_rss_mb DOUBLE PRECISION,
+    profile_path TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_vendas_data ON fato_vendas(fk_data_venda);
 CREATE INDEX IF NOT EXISTS idx_vendas_cliente ON fato_vendas(customer_id);
 CREATE INDEX IF NOT EXISTS idx_vendas_produto ON fato_vendas(product_id);
 CREATE INDEX IF NOT EXISTS idx_previsoes_order ON fato_previsoes_logistica(order_id);
+CREATE INDEX IF NOT EXISTS idx_metrics_run ON pipeline_run_metrics(run_id);
+CREATE INDEX IF NOT EXISTS idx_agg_diario_regiao ON agg_vendas_diario(regiao, id_data)
+    INCLUDE (receita, qtd_itens, qtd_pedidos, qtd_entregues, qtd_atrasados, qtd_avaliacoes, soma_notas);
+CREATE INDEX IF NOT EXISTS idx_agg_diario_categoria ON agg_vendas_diario(product_category_name, id_data)
+    INCLUDE (receita, qtd_itens, qtd_pedidos, qtd_entregues, qtd_atrasados, qtd_avaliacoes, soma_notas);
+CREATE INDEX IF NOT EXISTS idx_agg_vendedor_mes ON agg_vendedor_mensal(id_mes)
+    INCLUDE (seller_id, receita, qtd_itens, qtd_atrasados, qtd_entregues);
 
 COMMIT;